@@ -22,7 +22,26 @@ def post_list() -> rx.Component:
             rx.foreach(
                 PostState.posts,
                 lambda post: rx.table.row(
-                    rx.table.cell(post["title"]),
+                    rx.table.cell(
+                        rx.cond(
+                            PostState.is_search_result,
+                            # 검색 결과: DB가 원문을 이스케이프하고 검색어만 <span class="keyword">로 감싼 HTML
+                            rx.vstack(
+                                rx.html(post["title_highlight"], font_weight="500"),
+                                rx.html(post["snippet"], font_size="0.875em", color=rx.color("gray", 11)),
+                                spacing="1",
+                                align="start",
+                                # 검색어 강조 스타일
+                                style={"& .keyword": {"background_color": rx.color("yellow", 5), "border_radius": "2px"}},
+                            ),
+                            rx.vstack(
+                                rx.text(post["title"], weight="medium"),
+                                rx.text(post["excerpt"], size="2", color_scheme="gray", trim="both"),
+                                spacing="1",
+                                align="start",
+                            ),
+                        )
+                    ),
                     rx.table.cell(post["created_at"]),
                     # on_click 이벤트를 State의 이벤트 핸들러로 변경
                     on_click=PostState.go_to_post(post["id"]),
@@ -35,6 +54,21 @@ def post_list() -> rx.Component:
         ),
         width="100%",
     )
+
+def load_more_button() -> rx.Component:
+    """다음 페이지가 있을 때 목록 아래에 표시하는 '더 보기' 버튼입니다."""
+    return rx.cond(
+        PostState.has_more_posts,
+        rx.center(
+            rx.button(
+                "더 보기",
+                on_click=PostState.load_more_posts,
+                loading=PostState.is_loading_more,
+                variant="soft",
+            ),
+            width="100%",
+        ),
+    )
     
 @rx.page(route="/boards/[board_id]", on_load=[AuthState.check_auth, PostState.load_board_and_posts])
 def board_detail_page() -> rx.Component:
@@ -73,10 +107,14 @@ def board_detail_page() -> rx.Component:
                     margin_bottom="1.5em",
                 ),
 
+                rx.cond(
+                    PostState.is_search_result & (PostState.posts.length() == 0) & ~PostState.is_loading,
+                    rx.text("검색 결과가 없습니다.", color_scheme="gray"),
+                ),
                 rx.cond(
                     PostState.is_loading,
                     rx.center(rx.spinner(), height="30vh"),
-                    post_list()
+                    rx.vstack(post_list(), load_more_button(), width="100%", spacing="4"),
                 ),
                 spacing="5",
             ),
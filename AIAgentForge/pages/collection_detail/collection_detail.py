@@ -36,6 +36,15 @@ def render_upload_progress() -> rx.Component:
         ),
     )
 
+def document_status_badge(doc) -> rx.Component:
+    """documents.status에 따라 수집 상태와 청크 수를 표시합니다."""
+    return rx.match(
+        doc["status"],
+        ("indexed", rx.badge(f"완료 ({doc['chunk_count']} chunks)", color_scheme="green")),
+        ("failed", rx.tooltip(rx.badge("실패", color_scheme="red"), content=doc["status_error"])),
+        rx.badge(doc["status"], color_scheme="orange"),
+    )
+
 def document_list() -> rx.Component:
     """DB에 저장된 문서 목록을 표시합니다."""
     return rx.table.root(
@@ -43,6 +52,7 @@ def document_list() -> rx.Component:
             rx.table.row(
                 rx.table.column_header_cell("문서 이름"),
                 rx.table.column_header_cell("생성일"),
+                rx.table.column_header_cell("상태"),
                 rx.table.column_header_cell("작업"),
             )
         ),
@@ -52,12 +62,26 @@ def document_list() -> rx.Component:
                 lambda doc: rx.table.row(
                     rx.table.cell(doc["name"]),
                     rx.table.cell(doc["created_at"]),
+                    rx.table.cell(document_status_badge(doc)),
                     rx.table.cell(
-                        rx.button(
-                            "삭제", 
-                            color_scheme="red", 
-                            variant="soft",
-                            on_click=DocumentState.delete_document(doc["id"])  # 삭제 핸들러 추가 (doc에 "id" 키가 있다고 가정)
+                        rx.hstack(
+                            rx.cond(
+                                doc["status"] != "indexed",
+                                rx.button(
+                                    "재개",
+                                    variant="soft",
+                                    # 이 화면에서 처리 중인 문서는 다시 재개할 수 없습니다.
+                                    disabled=DocumentState.upload_status.contains(doc["name"]),
+                                    on_click=DocumentState.resume_document(doc["id"]),
+                                ),
+                            ),
+                            rx.button(
+                                "삭제", 
+                                color_scheme="red", 
+                                variant="soft",
+                                on_click=DocumentState.delete_document(doc["id"])  # 삭제 핸들러 추가 (doc에 "id" 키가 있다고 가정)
+                            ),
+                            spacing="2",
                         )
                     ),                    
                 )
@@ -109,7 +133,6 @@ def collection_detail_page() -> rx.Component:
             border="1px dotted rgb(107, 114, 128)",
             padding="2em",
             width="100%",
-            is_disabled=DocumentState.is_uploading,
             on_drop=DocumentState.handle_upload(
                 rx.upload_files(
                     upload_id="upload",
@@ -2,6 +2,7 @@
 import reflex as rx
 from ..state.collection_state import CollectionState
 from ..state.auth_state import AuthState
+from ..utils.vector_settings import SUPPORTED_DIMENSIONS
 from AIAgentForge.components.navbar import navbar  # Navbar 임포트 추가
 
 def collection_row(collection: dict) -> rx.Component:
@@ -14,6 +15,7 @@ def collection_row(collection: dict) -> rx.Component:
             )
         ),
         rx.table.cell(collection["created_at"]),
+        rx.table.cell(rx.cond(collection["embedding_dimensions"], collection["embedding_dimensions"], "기본값")),
         rx.table.cell(
             rx.button(
                 "삭제",
@@ -34,6 +36,11 @@ def collections_page() -> rx.Component:
             rx.form.root(
                 rx.hstack(
                     rx.input(name="name", placeholder="새 컬렉션 이름", required=True),
+                    rx.select(
+                        ["기본값", *[str(dims) for dims in SUPPORTED_DIMENSIONS]],
+                        name="embedding_dimensions",
+                        default_value="기본값",
+                    ),
                     rx.button("생성", type="submit"),
                 ),
                 on_submit=CollectionState.create_collection,
@@ -47,6 +54,7 @@ def collections_page() -> rx.Component:
                         rx.table.row(
                             rx.table.column_header_cell("이름"),
                             rx.table.column_header_cell("생성일"),
+                            rx.table.column_header_cell("임베딩 차원"),
                             rx.table.column_header_cell("작업"),
                         )
                     ),
@@ -72,16 +72,29 @@ def search_page() -> rx.Component:
 
             # 로딩 및 결과 표시를 위한 조건부 렌더링
             rx.cond(
-                SearchState.is_loading,
-                # 로딩 중일 때: 스피너 표시
+                SearchState.is_retrieving,
+                # 검색 중일 때: 스피너 표시
                 rx.center(rx.spinner(size="3"), width="100%"),
-                # 로딩이 아닐 때: 결과 표시
+                # 검색이 끝나면 결과를 먼저 보여주고 답변은 생성되는 대로 표시
                 rx.vstack(
                     # LLM 답변 표시
                     rx.cond(
                         SearchState.llm_answer,
                         rx.vstack(
-                            rx.heading("답변", size="5"),
+                            rx.hstack(
+                                rx.heading("답변", size="5"),
+                                rx.spacer(),
+                                rx.cond(
+                                    SearchState.ttft_ms > 0,
+                                    rx.text(
+                                        f"검색 {SearchState.retrieval_ms} ms · 첫 토큰 {SearchState.ttft_ms} ms",
+                                        size="1",
+                                        color_scheme="gray",
+                                    ),
+                                ),
+                                align="center",
+                                width="100%",
+                            ),
                             rx.card(
                                 rx.markdown(SearchState.llm_answer),
                                 width="100%"
@@ -89,11 +102,20 @@ def search_page() -> rx.Component:
                             align="start",
                             width="100%"
                         ),
-                        # 초기 메시지 표시 (LLM 답변이 아직 없을 때)
-                        rx.center(
-                            rx.text("질문을 입력하면 문서 기반의 답변을 생성합니다.", color_scheme="gray"),
-                            width="100%",
-                            height="10em"
+                        rx.cond(
+                            SearchState.is_loading,
+                            # 검색 결과는 나왔고 답변의 첫 토큰을 기다리는 중
+                            rx.hstack(
+                                rx.spinner(size="2"),
+                                rx.text("답변 생성 중...", color_scheme="gray"),
+                                align="center",
+                            ),
+                            # 초기 메시지 표시 (LLM 답변이 아직 없을 때)
+                            rx.center(
+                                rx.text("질문을 입력하면 문서 기반의 답변을 생성합니다.", color_scheme="gray"),
+                                width="100%",
+                                height="10em"
+                            ),
                         ),
                     ),
                     
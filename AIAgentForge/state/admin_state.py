@@ -2,8 +2,7 @@
 import reflex as rx
 from .base import BaseState
 from .auth_state import AuthState
-from supabase import create_client, Client
-import os
+from postgrest import AsyncPostgrestClient
 
 class AdminState(BaseState):
     """관리자 패널의 상태와 로직을 관리합니다."""
@@ -13,19 +12,14 @@ class AdminState(BaseState):
     boards: list[dict] = []
     is_loading_boards: bool = False
 
-    async def _get_authed_client(self) -> Client | None:
-        """현재 사용자의 인증 토큰으로 초기화된 Supabase 클라이언트를 반환합니다."""
+    async def _get_authed_client(self) -> AsyncPostgrestClient | None:
+        """현재 사용자의 인증 토큰으로 초기화된 비동기 Postgrest 클라이언트를 반환합니다. (토큰별로 캐시된 클라이언트)"""
         auth_state = await self.get_state(AuthState)
         if not auth_state.is_authenticated or not auth_state.access_token:
             print("Authentication error: User is not logged in or token is missing.")
             return None
         
-        url: str = os.environ.get("SUPABASE_URL")
-        key: str = os.environ.get("SUPABASE_ANON_KEY")
-        
-        authed_client: Client = create_client(url, key)
-        authed_client.auth.set_session(auth_state.access_token, auth_state.refresh_token)
-        return authed_client
+        return self._async_postgrest_client_for_token(auth_state.access_token)
 
     async def load_all_users(self):
         pass
@@ -35,7 +29,7 @@ class AdminState(BaseState):
         self.is_loading_boards = True
         yield
         try:
-            response = self.supabase_client.from_("boards").select("*").order("created_at", desc=True).execute()
+            response = await self._anon_client().from_("boards").select("*").order("created_at", desc=True).execute()
             self.boards = response.data
         except Exception as e:
             print(f"Error loading boards: {e}")
@@ -56,7 +50,7 @@ class AdminState(BaseState):
                 return
 
             # 인증된 클라이언트로 RPC 함수를 호출합니다.
-            authed_client.rpc(
+            await authed_client.rpc(
                 "create_new_board",
                 {
                     "board_name": form_data["name"],
@@ -77,7 +71,7 @@ class AdminState(BaseState):
             if not authed_client:
                 return
                 
-            authed_client.from_("boards").update(permissions).eq("id", board_id).execute()
+            await authed_client.from_("boards").update(permissions).eq("id", board_id).execute()
             yield AdminState.load_all_boards
         except Exception as e:
             print(f"Error updating board permissions: {e}")
@@ -89,7 +83,7 @@ class AdminState(BaseState):
             if not authed_client:
                 return
 
-            authed_client.from_("boards").delete().eq("id", board_id).execute()
+            await authed_client.from_("boards").delete().eq("id", board_id).execute()
             yield AdminState.load_all_boards
         except Exception as e:
             print(f"Error deleting board: {e}")
@@ -1,6 +1,7 @@
 # AIAgentForge/state/auth_state.py
 import reflex as rx
 from .base import BaseState
+from ..utils.token_verifier import token_verifier
 
 class AuthState(BaseState):
     """
@@ -37,6 +38,15 @@ class AuthState(BaseState):
         This is the single source of truth for auth status.
         It runs every time a protected page is loaded.
         """
+        async for event in self._verify_session(remote=False):
+            yield event
+
+    async def _verify_session(self, remote: bool):
+        """
+        Verifies the access token and refreshes the session when it is no longer valid.
+        The token is verified locally (signature and expiry) unless remote=True,
+        which asks the Auth server so that revoked sessions are rejected immediately.
+        """
         # If there is no access token in the cookie, the user is not logged in.
         if not self.access_token:
             # If server state is out of sync, reset it.
@@ -47,27 +57,23 @@ class AuthState(BaseState):
             return
 
         try:
-            # The token exists. Verify its validity by fetching the user from Supabase.
-            response = self.supabase_client.auth.get_user(self.access_token)
-            if response and response.user:
-                self.user = response.user
-                self.is_authenticated = True
-                yield
-            else:
-                # get_user가 user를 반환하지 않는 예외적인 경우
-                raise Exception("User not found with the given token.")
+            # The token exists. Verify it locally (cached briefly per token) or with the Auth server.
+            self.user = await token_verifier.verify(self.access_token, remote=remote)
+            self.is_authenticated = True
+            yield
 
         except Exception:
-            # 3. get_user 실패: access_token이 만료되었거나 유효하지 않다는 의미입니다.
+            # 3. 토큰 검증 실패: access_token이 만료되었거나 유효하지 않다는 의미입니다.
             # 이제 refresh_token으로 세션 갱신을 시도합니다.
             if not self.refresh_token:
                 # 갱신 토큰조차 없으면 완전히 로그아웃 처리합니다.
                 self._reset_auth_state()
                 yield rx.redirect("/login")
+                return
 
             try:
                 # 4. refresh_token으로 새로운 세션(access_token + refresh_token)을 요청합니다.
-                response = await self.supabase_client.auth.refresh_session(self.refresh_token)
+                response = await self._auth_client().refresh_session(self.refresh_token)
 
                 # 5. 세션 갱신 성공: 새로운 토큰들로 상태를 업데이트합니다 (토큰 로테이션).
                 if response.session:
@@ -88,8 +94,9 @@ class AuthState(BaseState):
     async def check_admin(self):
         """관리자 페이지 접근을 위한 인증 및 권한을 확인합니다."""
         # 1단계: 사용자가 로그인했는지 먼저 확인합니다.
-        # check_auth의 이벤트를 체이닝하여 yield합니다. (리디렉션이 발생하면 여기서 중단됨)
-        async for event in self.check_auth():
+        # 세션 확인 이벤트를 체이닝하여 yield합니다. (리디렉션이 발생하면 여기서 중단됨)
+        # 권한 변경이나 로그아웃이 바로 반영되어야 하므로 캐시 없이 Auth 서버에서 확인합니다.
+        async for event in self._verify_session(remote=True):
             yield event
 
         # 2단계: 로그인한 사용자의 역할이 'admin'이 아닌 경우, 메인 페이지로 리디렉션합니다.
@@ -111,7 +118,7 @@ class AuthState(BaseState):
         yield
 
         try:
-            response = self.supabase_client.auth.sign_in_with_password(
+            response = await self._auth_client().sign_in_with_password(
                 {"email": form_data["email"], "password": form_data["password"]}
             )
             if response.session:
@@ -134,12 +141,19 @@ class AuthState(BaseState):
 
     async def handle_logout(self):
         """Logs the user out, clears all state, and redirects."""
+        access_token = self.access_token
         self.access_token = ""
         self.refresh_token = ""
         self.is_authenticated = False
         self.user = None
-        # Inform Supabase to invalidate the token on the server.
-        self.supabase_client.auth.sign_out()
+        # Inform Supabase to invalidate this user's token on the server.
+        # The auth client is shared and keeps no session, so pass the token explicitly.
+        if access_token:
+            token_verifier.forget(access_token)
+            try:
+                await self._auth_client().admin.sign_out(access_token)
+            except Exception:
+                pass
         yield rx.redirect("/login")
 
     async def handle_signup(self, form_data: dict):
@@ -149,7 +163,7 @@ class AuthState(BaseState):
         yield
 
         try:
-            response = self.supabase_client.auth.sign_up(
+            response = await self._auth_client().sign_up(
                 {"email": form_data["email"], "password": form_data["password"]}
             )
             if response.user:
@@ -1,11 +1,12 @@
 # AIAgentForge/state/base.py
 import os
 import reflex as rx
-from supabase import create_client, Client
 from gotrue.types import User
-from typing import ClassVar
 from dotenv import load_dotenv
-from postgrest import SyncPostgrestClient
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+from storage3 import AsyncStorageClient, SyncStorageClient
+from supabase_auth import AsyncGoTrueClient
+from ..utils.supabase_clients import client_factory
 # --- [삭제된 부분] ---
 # 순환 참조를 유발하는 최상위 import를 제거합니다.
 # from .auth_state import AuthState
@@ -26,39 +27,61 @@ class BaseState(rx.State):
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
 
-    supabase_client: ClassVar[Client] = create_client(
-        SUPABASE_URL,
-        SUPABASE_KEY
-    )
+    # 데이터 접근 계층: 이벤트 핸들러에서는 비동기 클라이언트를 await해서 사용하므로
+    # 요청을 기다리는 동안 이벤트 루프가 다른 사용자의 이벤트를 처리할 수 있습니다.
+    # 동기 클라이언트(*_for_token)는 asyncio.to_thread로 실행하는 작업에서만 사용합니다.
+    @staticmethod
+    def _auth_client() -> AsyncGoTrueClient:
+        """Supabase Auth 비동기 클라이언트를 반환합니다. 세션을 저장하지 않으므로 토큰을 직접 넘겨야 합니다."""
+        return client_factory.auth()
+
+    @staticmethod
+    def _anon_client() -> AsyncPostgrestClient:
+        """익명(anon key) 권한의 비동기 Postgrest 클라이언트를 반환합니다. RLS상 공개된 데이터 조회에 사용합니다."""
+        return client_factory.anon_postgrest()
 
     # Supabase의 데이터베이스(Postgres) 부분만을 다루는 클라이언트
-    async def _get_authenticated_client(self) -> SyncPostgrestClient:
-        """인증된 Postgrest 클라이언트를 반환합니다."""
+    async def _get_authenticated_client(self) -> AsyncPostgrestClient:
+        """인증된 비동기 Postgrest 클라이언트를 반환합니다."""
         # 함수 내에서 AuthState를 import하여 순환 참조를 방지합니다.
         from .auth_state import AuthState
         
         auth_state = await self.get_state(AuthState)
         if not auth_state.is_authenticated:
             raise Exception("사용자가 인증되지 않았습니다.")
-        return SyncPostgrestClient(
-            f"{self.SUPABASE_URL}/rest/v1",
-            headers={
-                "apikey": self.SUPABASE_KEY,
-                "Authorization": f"Bearer {auth_state.access_token}",
-            }
-        )
+        return self._async_postgrest_client_for_token(auth_state.access_token)
+
+    @staticmethod
+    def _async_postgrest_client_for_token(access_token: str) -> AsyncPostgrestClient:
+        """주어진 access token으로 인증된 비동기 Postgrest 클라이언트를 반환합니다.
+        get_state를 호출할 수 없는 백그라운드 작업과 API 라우터에서 사용합니다.
+        토큰별로 캐시되고 연결은 워커 전체가 공유하므로 호출할 때마다 새 연결을 열지 않습니다."""
+        return client_factory.async_postgrest(access_token)
+
+    @staticmethod
+    def _postgrest_client_for_token(access_token: str) -> SyncPostgrestClient:
+        """주어진 access token으로 인증된 동기 Postgrest 클라이언트를 반환합니다.
+        asyncio.to_thread로 실행하는 작업(문서 수집 파이프라인, 로컬 인덱스 적재)에서 사용합니다."""
+        return client_factory.postgrest(access_token)
 
-    #전체 Client 인스턴스(Supabase Python SDK의 supabase-py 라이브러리에서 제공). 
-    # 이는 데이터베이스(Postgrest)뿐만 아니라 인증(auth), 실시간(realtime), 스토리지(storage) 등 
-    # Supabase의 모든 기능을 포함합니다
-    async def _get_supabase_client(self) -> Client:
-        """인증된 Supabase 클라이언트를 반환합니다."""
+    # 스토리지(파일) 작업용 클라이언트. 전체 Supabase Client(auth, realtime 등)를 만들지 않고
+    # 스토리지 클라이언트만 토큰별로 캐시해 사용합니다.
+    async def _get_storage_client(self) -> AsyncStorageClient:
+        """인증된 비동기 Storage 클라이언트를 반환합니다."""
         # 함수 내에서 AuthState를 import하여 순환 참조를 방지합니다.
         from .auth_state import AuthState
 
         auth_state = await self.get_state(AuthState)
         if not auth_state.is_authenticated:
             raise Exception("사용자가 인증되지 않았습니다.")
-        client: Client = create_client(self.SUPABASE_URL, self.SUPABASE_KEY)
-        client.auth.set_session(auth_state.access_token, '')
-        return client
+        return self._async_storage_client_for_token(auth_state.access_token)
+
+    @staticmethod
+    def _async_storage_client_for_token(access_token: str) -> AsyncStorageClient:
+        """주어진 access token으로 인증된 비동기 Storage 클라이언트를 반환합니다."""
+        return client_factory.async_storage(access_token)
+
+    @staticmethod
+    def _storage_client_for_token(access_token: str) -> SyncStorageClient:
+        """주어진 access token으로 인증된 동기 Storage 클라이언트를 반환합니다. (스레드에서 실행하는 작업용)"""
+        return client_factory.storage(access_token)
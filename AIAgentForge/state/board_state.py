@@ -19,7 +19,7 @@ class BoardState(BaseState):
         try:
             # RLS 정책이 자동으로 필터링해주므로, select만 호출하면
             # Supabase가 현재 사용자의 권한에 맞는 데이터만 반환합니다.
-            response = self.supabase_client.from_("boards").select("*").order("name").execute()
+            response = await self._anon_client().from_("boards").select("*").order("name").execute()
             self.visible_boards = response.data
         except Exception as e:
             print(f"Error loading visible boards: {e}")
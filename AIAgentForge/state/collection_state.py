@@ -6,6 +6,9 @@ from postgrest import SyncPostgrestClient
 import os
 from dotenv import load_dotenv
 from typing import Optional
+from ..utils.vector_settings import check_dimensions
+from ..utils.local_vector_index import drop_collection
+from ..utils.search_result_cache import invalidate_collection_results
 import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -62,7 +65,9 @@ class CollectionState(BaseState):
         try:
             # 4. 지역 변수의 ID를 사용하여 삭제를 수행합니다.
             client = await self._get_authenticated_client()
-            client.from_("collections").delete().eq("id", collection_id).execute()
+            await client.from_("collections").delete().eq("id", collection_id).execute()
+            drop_collection(collection_id)
+            invalidate_collection_results(collection_id)
             # 5. 목록을 새로고침합니다.
             yield CollectionState.load_collections
         except Exception as e:
@@ -94,7 +99,7 @@ class CollectionState(BaseState):
                 return
             
             client = await self._get_authenticated_client()
-            response = client.from_("collections").select("*").eq("owner_id", auth_state.user.id).order("created_at", desc=True).execute()
+            response = await client.from_("collections").select("*").eq("owner_id", auth_state.user.id).order("created_at", desc=True).execute()
             self.collections = response.data
         except Exception as e:
             self.alert_message = f"컬렉션 로딩 실패: {str(e)}"
@@ -112,6 +117,18 @@ class CollectionState(BaseState):
             yield
             return
 
+        # 임베딩 차원은 생성할 때만 정할 수 있습니다. 선택하지 않으면 배포 기본값을 사용합니다.
+        embedding_dimensions = None
+        if form_data.get("embedding_dimensions", "").isdigit():
+            embedding_dimensions = int(form_data["embedding_dimensions"])
+            try:
+                check_dimensions(embedding_dimensions)
+            except ValueError as e:
+                self.alert_message = str(e)
+                self.show_alert = True
+                yield
+                return
+
         self.is_loading = True
         yield
         try:
@@ -120,9 +137,10 @@ class CollectionState(BaseState):
                 raise Exception("User not found")
 
             client = await self._get_authenticated_client()
-            client.from_("collections").insert({
+            await client.from_("collections").insert({
                 "name": collection_name,
-                "owner_id": auth_state.user.id
+                "owner_id": auth_state.user.id,
+                "embedding_dimensions": embedding_dimensions,
             }).execute()
             
             self.alert_message = "컬렉션이 성공적으로 생성되었습니다."
@@ -9,12 +9,36 @@ import asyncio
 from supabase import create_client, Client
 from reflex.vars import Var
 from typing import List
-from ..utils.text_extractor import extract_text_from_file
-from ..utils.chunker import chunk_text
-from ..utils.embedder import generate_embeddings
+from ..utils.extraction_service import EXTRACTION_WORKERS, extract_chunks_async
+from ..utils.embedder import generate_embeddings, get_embedding_model
+from ..utils.vector_settings import get_collection_dimensions_async
+from ..utils.ingestion_jobs import (
+    IngestionJob,
+    submit_ingestion_job,
+    pop_ingestion_job,
+    claim_document,
+    release_document,
+    STATUS_UPLOADED,
+    STATUS_CHUNKED,
+    STATUS_EMBEDDED,
+    STATUS_INDEXED,
+    STATUS_FAILED,
+)
+from ..utils.upload_spool import spool_upload, remove_spool, upload_spooled_file, download_to_spool
+from ..utils.ingestion_pipeline import Stage, run_pipeline, get_stage_stats
+from ..utils.local_vector_index import invalidate_documents
+from ..utils.search_result_cache import invalidate_collection_results
+from ..utils.section_writer import (
+    write_sections,
+    fetch_section_hashes,
+    plan_section_update,
+    delete_sections,
+)
 from urllib.parse import parse_qs, quote # quote import 추가
 import uuid
+import mimetypes
 import logging
+from datetime import datetime, timezone
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
@@ -25,6 +49,12 @@ SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
 BUCKET_NAME = "document-files"
 DOCUMENT_TABLE = "documents"
 
+def _storage_object_path(storage_path: str) -> str:
+    """documents.storage_path가 버킷 이름을 포함하고 있다면 제거합니다. (호환성을 위해)"""
+    if storage_path.startswith(f"{BUCKET_NAME}/"):
+        return storage_path[len(f"{BUCKET_NAME}/"):]
+    return storage_path
+
 class DocumentState(BaseState):
     """특정 컬렉션의 문서 관리와 관련된 상태 및 로직을 처리합니다."""
     
@@ -39,6 +69,11 @@ class DocumentState(BaseState):
     upload_status: dict[str, str] = {}
     upload_errors: dict[str, str] = {}
 
+    # 백그라운드 수집 작업 집계 (백엔드 전용 변수)
+    _active_jobs: int = 0
+    _jobs_total: int = 0
+    _jobs_succeeded: int = 0
+
     show_alert: bool = False
     alert_message: str = ""
 
@@ -69,13 +104,15 @@ class DocumentState(BaseState):
         try:
             client = await self._get_authenticated_client()
             
-            collection_response = client.from_("collections").select("name").eq("id", collection_id).single().execute()
+            # 컬렉션 이름과 문서 목록을 동시에 조회합니다.
+            collection_response, response = await asyncio.gather(
+                client.from_("collections").select("name").eq("id", collection_id).single().execute(),
+                client.from_("documents").select("*").eq("collection_id", collection_id).execute(),
+            )
             if collection_response.data:
                 self.collection_name = collection_response.data.get("name", "이름 없음")
             else:
                 self.collection_name = "알 수 없는 컬렉션"
-                            
-            response = client.from_("documents").select("*").eq("collection_id", collection_id).execute()
             self.documents = response.data
         except Exception as e:
             self.alert_message = f"문서 로딩 실패: {e}"
@@ -86,7 +123,8 @@ class DocumentState(BaseState):
 
     # Supabase Bucket에 file을 upload
     async def handle_upload(self, files: list[rx.UploadFile]):
-        """업로드된 파일들을 처리하며 단계별로 상태를 직접 업데이트합니다."""
+        """업로드된 파일을 문서별 수집 작업으로 등록하고 즉시 반환합니다.
+        실제 업로드 → 추출/청킹 → 임베딩 → 저장은 run_ingestion_batch 백그라운드 이벤트가 처리합니다."""
         collection_id = self.router.url.split('/')[-1]
         
         if not collection_id:
@@ -97,220 +135,351 @@ class DocumentState(BaseState):
 
         if not files:
             return
-            
-        supabase_client = await self._get_supabase_client()
 
         auth_state = await self.get_state(AuthState)
         if not auth_state.user:
             print("사용자를 찾을 수 없습니다.")
             self.alert_message = "사용자를 찾을 수 없습니다."
             self.show_alert = True
-            self.is_uploading = False
             return
         user_id = auth_state.user.id
-        
-        db_client = await self._get_authenticated_client()
 
-        self.is_uploading = True
-        
+        if self._active_jobs == 0:
+            self._jobs_total = 0
+            self._jobs_succeeded = 0
+
+        job_ids = []
         for file in files:
             filename = file.name
             self.upload_status[filename] = "대기 중..."
             self.upload_progress[filename] = 0
             self.upload_errors.pop(filename, None)
-        yield
 
+            # UploadFile은 이 핸들러가 끝나면 닫히므로 내용은 여기서 임시 파일로 옮겨 둡니다.
+            # 조각 단위로 기록하므로 파일 크기와 관계없이 메모리 사용량이 일정합니다.
+            spool_path, content_hash, size = await spool_upload(file)
+            job_ids.append(submit_ingestion_job(IngestionJob(
+                filename=filename,
+                spool_path=spool_path,
+                content_type=file.content_type,
+                collection_id=collection_id,
+                user_id=user_id,
+                access_token=auth_state.access_token,
+                content_hash=content_hash,
+                size=size,
+            )))
+            self._active_jobs += 1
+            self._jobs_total += 1
 
-        successful_uploads = 0
-        for file in files:
-            original_filename = file.name # [수정] 원래 파일 이름 저장
-            try:
-                # [수정] DB 중복 체크는 원래 파일 이름으로 수행
-                existing_doc_res = db_client.from_("documents").select("id").eq("name", original_filename).eq("collection_id", collection_id).maybe_single().execute()
-                
-                if existing_doc_res and existing_doc_res.data:
-                    logger.warning(f"File '{original_filename}' already exists in this collection. Skipping.")
-                    self.upload_status[original_filename] = "❌ 실패"
-                    self.upload_errors[original_filename] = "이미 같은 이름의 파일이 존재합니다."
-                    self.upload_progress[original_filename] = 100
-                    yield
-                    continue
-                
-                file_content = await file.read()
-                content_type = file.content_type
-
-                self.upload_status[original_filename] = "스토리지에 업로드 중..."
-                self.upload_progress[original_filename] = 10
-                yield
-
-                # [수정] 스토리지에 저장할 새 파일 이름 생성 (UUID + 원래 확장자)
-                file_extension = os.path.splitext(original_filename)[1]
-                storage_filename = f"{uuid.uuid4()}{file_extension}"
-                storage_path = f"{user_id}/{collection_id}/{storage_filename}"
-                
-                logger.info(f"Attempting to upload to storage path: {storage_path}")
-
-                storage_response = supabase_client.storage.from_(BUCKET_NAME).upload(
-                    storage_path,
-                    file_content,
-                    {'content-type': content_type or 'application/octet-stream'}
-                )
+        self.is_uploading = True
+        return DocumentState.run_ingestion_batch(job_ids)
+
+    async def resume_document(self, doc_id: str):
+        """수집 도중 멈춘 문서를 다시 처리합니다.
 
-                if not storage_response.full_path:
-                    error_detail = storage_response.text
-                    raise Exception(f"Storage upload failed: {error_detail}")
-
-                # [수정] DB에는 원래 파일 이름(name)과 UUID 기반 경로(storage_path)를 함께 저장
-                response = db_client.from_("documents").insert({
-                    "name": original_filename,
-                    "collection_id": collection_id,
-                    "owner_id": user_id,
-                    "storage_path": storage_response.full_path
-                }).execute()
-
-                if response.data:
-                    inserted_document = response.data[0]
-                    document_id = inserted_document['id']
-                    print(f"새로 생성된 문서 ID: {document_id}")
-                    
-                self.upload_progress[original_filename] = 20
-                self.upload_status[original_filename] = "Text 추출 중"
-                successful_uploads += 1
-                yield
-                    
-                print(" Process Document")
-                
-                self.upload_progress[original_filename] = 30                
-                self.upload_status[original_filename] = "Text 추출 중"
-                yield
-                
-                text = extract_text_from_file(file_content, content_type)
-                logger.info(f"Extracted text length for {original_filename}: {len(text)}")
-                if not text:
-                    print(f"No text extracted for {original_filename}, content_type: {content_type}")
-                    
-                self.upload_progress[original_filename] = 50
-                self.upload_status[original_filename] = "Chunking"
-                yield
-
-                chunks = chunk_text(text)
-                logger.info(f"Number of chunks for {original_filename}: {len(chunks)}")
-                if not chunks:
-                    print(f"No chunks created for {original_filename}")
-
-                self.upload_progress[original_filename] = 60
-                self.upload_status[original_filename] = "Embedding"
-                yield
-
-                embeddings = await generate_embeddings([chunk['text'] for chunk in chunks])
-                logger.info(f"Number of embeddings for {original_filename}: {len(embeddings)}")
-
-                self.upload_progress[original_filename] = 80
-                self.upload_status[original_filename] = "DB Updating"
-                yield
-
-                logger.info(f"Using document_id: {document_id} for {original_filename}")
-                records_to_insert = [
-                    {
-                        "owner_id": user_id,
-                        "document_id": document_id,
-                        "content": chunk['text'],
-                        "embedding": embedding,
-                    }
-                    for chunk, embedding in zip(chunks, embeddings)
-                ]
-                logger.info(f"Number of records to insert for {original_filename}: {len(records_to_insert)}")
-                
-                
-                if records_to_insert:
-                    response = supabase_client.table("document_sections").insert(records_to_insert).execute()
-                    logger.info(f"Insert response for {original_filename}: data length={len(response.data) if response.data else 0}, count={response.count}")
-                else:
-                    logger.info(f"No records to insert for {original_filename}")
-
-                self.upload_progress[original_filename] = 100
-                self.upload_status[original_filename] = "✅ 완료"
-
-                yield
-                    
-            except Exception as e:
-                self.upload_status[original_filename] = "❌ 실패"
-                self.upload_errors[original_filename] = f"오류: {str(e)}"
-                self.upload_progress[original_filename] = 100
-                yield
-                
-        if successful_uploads > 0:
-            self.alert_message = f"{successful_uploads} / {len(files)}개의 파일이 성공적으로 업로드되었습니다."
+        청크와 임베딩은 DB에 남아 있지 않으므로 저장된 상태와 관계없이 원본을 스토리지에서 다시 받아
+        추출부터 전체 파이프라인을 다시 실행합니다. 대신 이미 저장된 section은 내용 해시로 걸러 다시 임베딩하거나
+        저장하지 않고, 남은 청크의 임베딩도 대부분 임베딩 캐시에서 가져옵니다.
+        """
+        doc = next((d for d in self.documents if d["id"] == doc_id), None)
+        if doc is None or doc.get("status") == STATUS_INDEXED:
+            return
+
+        auth_state = await self.get_state(AuthState)
+        if not auth_state.user:
+            self.alert_message = "사용자를 찾을 수 없습니다."
             self.show_alert = True
-            yield DocumentState.load_documents_on_page_load
-        
-        await asyncio.sleep(5)
-        self.is_uploading = False
-        self.upload_progress = {}
-        self.upload_status = {}
-        self.upload_errors = {}
-        yield
-                            
-    #@rx.event(background=True)
-    async def ProcessDocument(self, supabase_client, filename: str, collection_id: str):
-        try:
+            return
+
+        filename = doc["name"]
+        job = IngestionJob(
+            filename=filename,
+            spool_path=None,
+            content_type=doc.get("content_type") or mimetypes.guess_type(filename)[0],
+            collection_id=doc["collection_id"],
+            user_id=auth_state.user.id,
+            access_token=auth_state.access_token,
+            storage_path=doc["storage_path"],
+            document_id=doc["id"],
+            content_hash=doc.get("content_hash"),
+        )
+        # 아직 처리 중인 문서를 다시 재개하면 두 파이프라인이 같은 문서의 section을 동시에 고치게 됩니다.
+        if not claim_document(job, doc_id):
+            self.alert_message = f"'{filename}'은(는) 이미 처리 중입니다."
+            self.show_alert = True
+            return
+
+        if self._active_jobs == 0:
+            self._jobs_total = 0
+            self._jobs_succeeded = 0
 
-            # async with self:
-            #     self.upload_progress[filename] = 0
-                
-
-            text = extract_text_from_file(self.file_content, self.content_type)
-            logger.info(f"Extracted text length for {filename}: {len(text)}")
-            if not text:
-                print(f"No text extracted for {filename}, content_type: {self.content_type}")
-                
-            # async with self:
-            #     self.upload_progress[filename] = 25
-
-            chunks = chunk_text(text)
-            logger.info(f"Number of chunks for {filename}: {len(chunks)}")
-            if not chunks:
-                print(f"No chunks created for {filename}")
+        self.upload_status[filename] = "재개 대기 중..."
+        self.upload_progress[filename] = 0
+        self.upload_errors.pop(filename, None)
+        job_id = submit_ingestion_job(job)
+        self._active_jobs += 1
+        self._jobs_total += 1
+        self.is_uploading = True
+        return DocumentState.run_ingestion_batch([job_id])
+
+    async def _set_upload_progress(self, filename: str, progress: int, status: str):
+        """백그라운드 작업에서 짧게 상태 잠금을 잡고 진행 상황을 갱신합니다."""
+        async with self:
+            self.upload_progress[filename] = progress
+            self.upload_status[filename] = status
+
+    async def _mark_upload_failed(self, job: IngestionJob, error: Exception):
+        """파이프라인 단계에서 실패한 문서를 UI와 documents.status에 표시합니다."""
+        remove_spool(job.spool_path)
+        job.spool_path = None
+        async with self:
+            self.upload_status[job.filename] = "❌ 실패"
+            self.upload_errors[job.filename] = f"오류: {str(error)}"
+            self.upload_progress[job.filename] = 100
+        if job.document_id:
+            # 일부 페이지가 이미 저장되었을 수 있으므로 검색 캐시와 로컬 인덱스를 무효화합니다.
+            invalidate_documents(job.collection_id, [job.document_id])
+            invalidate_collection_results(job.collection_id)
+            try:
+                await self._update_document_status(job, STATUS_FAILED, status_error=str(error)[:500])
+            except Exception:
+                logger.exception(f"Failed to record failure status for {job.filename}")
+
+    async def _update_document_status(self, job: IngestionJob, status: str, **fields):
+        """documents 레코드에 현재 수집 단계를 기록합니다."""
+        db_client = self._async_postgrest_client_for_token(job.access_token)
+        values = {"status": status, "status_updated_at": datetime.now(timezone.utc).isoformat(), **fields}
+        if status != STATUS_FAILED:
+            values["status_error"] = None
+        await db_client.from_("documents").update(values).eq("id", job.document_id).execute()
+
+    @rx.event(background=True)
+    async def run_ingestion_batch(self, job_ids: list[str]):
+        """업로드된 문서들을 단계별 파이프라인으로 처리합니다.
+
+        스토리지 업로드, 추출/청킹, 임베딩, document_sections 저장 단계가 동시에 실행되므로
+        한 파일의 임베딩이 진행되는 동안 다음 파일의 추출과 이전 파일의 저장이 함께 이루어집니다.
+        """
+        jobs = [job for job in map(pop_ingestion_job, job_ids) if job is not None]
+
+        try:
+            await run_pipeline(
+                jobs,
+                [
+                    Stage("storage_upload", self._upload_stage, concurrency=2),
+                    Stage("extract_chunk", self._extract_stage, concurrency=EXTRACTION_WORKERS),
+                    Stage("embed", self._embed_stage, concurrency=2),
+                    Stage("write_sections", self._write_stage, concurrency=2),
+                ],
+                on_error=self._mark_upload_failed,
+            )
+        except Exception:
+            logger.exception("Ingestion batch failed")
+        finally:
+            # 파이프라인이 어떻게 끝나든 작업 수를 되돌려야 is_uploading이 풀립니다.
+            succeeded = sum(1 for job in jobs if job.completed)
+            for job in jobs:
+                release_document(job)
+                if not job.completed:
+                    remove_spool(job.spool_path)
+            logger.info(f"Ingestion batch finished: {succeeded}/{len(jobs)} documents, stages={get_stage_stats()}")
             async with self:
-                self.upload_progress[filename] = 50
-
-            embeddings = await generate_embeddings([chunk['text'] for chunk in chunks])
-            logger.info(f"Number of embeddings for {filename}: {len(embeddings)}")
-            # async with self:
-            #     self.upload_progress[filename] = 75
-
-            logger.info(f"Using collection_id: {collection_id} for {filename}")
-            records_to_insert = [
-                {
-                    "chunk_text": chunk['text'],
-                    "embedding": embedding,
-                    "document_name": filename,
-                    "collection_id": int(collection_id)  # Convert to int for Supabase
-                }
-                for chunk, embedding in zip(chunks, embeddings)
-            ]
-            logger.info(f"Number of records to insert for {filename}: {len(records_to_insert)}")
-            
-            # supabase_client = await self._get_supabase_client()
-            
-            if records_to_insert:
-                response = supabase_client.table("document_sections").insert(records_to_insert).execute()
-                logger.info(f"Insert response for {filename}: data length={len(response.data) if response.data else 0}, count={response.count}")
-            else:
-                logger.info(f"No records to insert for {filename}")
-            # async with self:
-            #     self.upload_progress[filename] = 100
-            #     #del self._upload_data[filename]
+                self._active_jobs -= len(job_ids)
+                self._jobs_succeeded += succeeded
+                batch_done = self._active_jobs == 0
+                if batch_done and self._jobs_succeeded > 0:
+                    self.alert_message = f"{self._jobs_succeeded} / {self._jobs_total}개의 파일이 성공적으로 업로드되었습니다."
+                    self.show_alert = True
+
+        if succeeded:
+            yield DocumentState.load_documents_on_page_load
 
-        except Exception as e:
-            logger.info(f"Error processing {filename}: {str(e)}")
-            import traceback
-            logger.info(traceback.format_exc())
+        if batch_done:
+            # 결과를 잠시 보여준 뒤 진행 표시를 정리합니다. 대기 중에는 상태 잠금을 잡지 않습니다.
+            await asyncio.sleep(5)
             async with self:
-                self.upload_progress[filename] = -1
-                # if filename in self._upload_data:
-                #     del self._upload_data[filename]
-        logger.info(f"process_document completed for {filename}")
+                if self._active_jobs == 0:
+                    self.is_uploading = False
+                    self.upload_progress = {}
+                    self.upload_status = {}
+                    self.upload_errors = {}
+
+    async def _upload_stage(self, job: IngestionJob) -> IngestionJob | None:
+        """파일을 스토리지에 올리고 documents 레코드를 생성합니다.
+
+        같은 이름의 문서가 이미 있으면 내용 해시를 비교합니다.
+        - 같고 완료된 문서: 건너뜁니다.
+        - 같고 수집 도중 멈춘 문서: 새로 올리지 않고 그 문서를 처음부터 다시 처리합니다. (저장된 section은 해시로 건너뜀)
+        - 다르면: 새 버전을 올리고 기존 문서를 갱신합니다. (바뀐 청크만 임베딩)
+        """
+        filename = job.filename
+        db_client = self._async_postgrest_client_for_token(job.access_token)
+
+        if job.document_id:
+            # 재개 작업: 스토리지에 있는 원본을 임시 파일로 다시 받아 옵니다.
+            if not job.spool_path:
+                await self._set_upload_progress(filename, 10, "스토리지에서 원본을 받는 중...")
+                job.spool_path, _, job.size = await asyncio.to_thread(
+                    download_to_spool, job.access_token, BUCKET_NAME, _storage_object_path(job.storage_path)
+                )
+            await self._set_upload_progress(filename, 20, "Text 추출 대기 중")
+            return job
+
+        # DB 중복 체크는 원래 파일 이름으로 수행
+        existing_doc_res = await db_client.from_("documents").select("id, status, content_hash, storage_path").eq("name", filename).eq("collection_id", job.collection_id).maybe_single().execute()
+        existing = existing_doc_res.data if existing_doc_res else None
+        unchanged = existing is not None and existing.get("content_hash") == job.content_hash
+        if unchanged and existing.get("status") == STATUS_INDEXED:
+            logger.info(f"File '{filename}' is unchanged. Skipping.")
+            await self._set_upload_progress(filename, 100, "✅ 변경 없음")
+            remove_spool(job.spool_path)
+            return None
+        # 같은 문서를 다른 작업(재개 등)이 처리 중이면 두 파이프라인이 section을 동시에 고치게 되므로 건너뜁니다.
+        if existing and not claim_document(job, existing["id"]):
+            logger.info(f"Document '{filename}' ({existing['id']}) is already being ingested. Skipping.")
+            await self._set_upload_progress(filename, 100, "이미 처리 중인 문서입니다")
+            remove_spool(job.spool_path)
+            return None
+        if unchanged:
+            logger.info(f"Resuming interrupted ingestion of '{filename}' from status {existing.get('status')}.")
+            job.document_id = existing["id"]
+            job.storage_path = existing["storage_path"]
+            await self._set_upload_progress(filename, 20, "중단된 문서를 다시 처리합니다")
+            return job
+
+        await self._set_upload_progress(filename, 10, "스토리지에 업로드 중...")
+
+        # 스토리지에 저장할 새 파일 이름 생성 (UUID + 원래 확장자)
+        file_extension = os.path.splitext(filename)[1]
+        storage_filename = f"{uuid.uuid4()}{file_extension}"
+        storage_path = f"{job.user_id}/{job.collection_id}/{storage_filename}"
+        logger.info(f"Attempting to upload to storage path: {storage_path}")
+
+        # 임시 파일에서 바로 스트리밍하며, 큰 파일은 재개 가능한 업로드로 나누어 보냅니다.
+        job.storage_path = await asyncio.to_thread(
+            upload_spooled_file, job.access_token, BUCKET_NAME, storage_path, job.spool_path, job.content_type
+        )
+
+        if existing:
+            # 같은 이름의 다른 버전: 새 문서를 만들지 않고 기존 문서를 갱신하여 바뀐 청크만 처리합니다.
+            logger.info(f"Updating existing document '{filename}' ({existing['id']}) with a new version.")
+            job.is_update = True
+            job.document_id = existing["id"]
+            job.replaced_storage_path = existing["storage_path"]
+            await db_client.from_("documents").update({
+                "storage_path": job.storage_path,
+                "content_type": job.content_type,
+                "content_hash": job.content_hash,
+                "status": STATUS_UPLOADED,
+                "status_updated_at": datetime.now(timezone.utc).isoformat(),
+            }).eq("id", job.document_id).execute()
+            await self._set_upload_progress(filename, 20, "새 버전 비교 대기 중")
+            return job
+
+        # DB에는 원래 파일 이름(name)과 UUID 기반 경로(storage_path)를 함께 저장
+        response = await db_client.from_("documents").insert({
+            "name": filename,
+            "collection_id": job.collection_id,
+            "owner_id": job.user_id,
+            "storage_path": job.storage_path,
+            "content_type": job.content_type,
+            "content_hash": job.content_hash,
+            "status": STATUS_UPLOADED,
+        }).execute()
+        if not response.data:
+            raise Exception("문서 레코드 생성에 실패했습니다.")
+        job.document_id = response.data[0]['id']
+        claim_document(job, job.document_id)
+        logger.info(f"새로 생성된 문서 ID: {job.document_id}")
+
+        await self._set_upload_progress(filename, 20, "Text 추출 대기 중")
+        return job
+
+    async def _extract_stage(self, job: IngestionJob) -> IngestionJob:
+        """워커 프로세스에서 페이지 단위로 추출하면서 바로 청크로 분할합니다."""
+        await self._set_upload_progress(job.filename, 30, "Text 추출 및 Chunking")
+
+        # 워커 프로세스는 임시 파일을 mmap으로 열어 읽으므로 파일 내용이 프로세스 사이로 복사되지 않습니다.
+        job.chunks = await extract_chunks_async(job.spool_path, job.content_type)
+        # 원본은 스토리지에 있으므로 임시 파일은 더 이상 필요 없습니다.
+        remove_spool(job.spool_path)
+        job.spool_path = None
+        job.chunk_count = len(job.chunks)
+        logger.info(f"Number of chunks for {job.filename}: {job.chunk_count}")
+        if not job.chunks:
+            logger.info(f"No text extracted for {job.filename}, content_type: {job.content_type}")
+        await self._update_document_status(job, STATUS_CHUNKED, chunk_count=job.chunk_count)
+
+        if job.chunks or job.is_update:
+            # 기존 section과 내용 해시로 비교하여 새로 생긴 청크만 남깁니다.
+            # 새 문서는 기존 section이 없으므로 모든 청크가 그대로 남고, 재개되거나 갱신된 문서는
+            # 이미 저장된 청크를 다시 임베딩하지 않으며 새 버전에 없는 section은 지워집니다.
+            db_client = self._postgrest_client_for_token(job.access_token)
+            existing_sections = await asyncio.to_thread(fetch_section_hashes, db_client, job.document_id)
+            plan = plan_section_update(job.document_id, job.chunks, existing_sections, get_embedding_model())
+            job.chunks = [job.chunks[i] for i in plan.insert_indices]
+            job.section_ids = plan.insert_ids
+            job.stale_section_ids = plan.stale_ids
+            logger.info(
+                f"Update plan for {job.filename}: keep {plan.kept_count}, "
+                f"insert {len(plan.insert_ids)}, delete {len(plan.stale_ids)}"
+            )
+
+        await self._set_upload_progress(job.filename, 50, "Embedding 대기 중")
+        return job
+
+    async def _embed_stage(self, job: IngestionJob) -> IngestionJob:
+        """청크 임베딩을 생성합니다. 내부적으로 배치 단위 동시 요청으로 처리됩니다.
+        재개된 문서는 이미 만든 임베딩을 임베딩 캐시에서 가져오므로 API를 다시 호출하지 않습니다."""
+        await self._set_upload_progress(job.filename, 60, f"Embedding ({len(job.chunks)}/{job.chunk_count} 청크)")
+
+        db_client = self._async_postgrest_client_for_token(job.access_token)
+        dimensions = await get_collection_dimensions_async(db_client, job.collection_id)
+        job.embeddings = await generate_embeddings([chunk['text'] for chunk in job.chunks], dimensions)
+        logger.info(f"Number of embeddings for {job.filename}: {len(job.embeddings)}")
+        await self._update_document_status(job, STATUS_EMBEDDED)
+
+        await self._set_upload_progress(job.filename, 80, "DB Updating")
+        return job
+
+    async def _write_stage(self, job: IngestionJob) -> IngestionJob:
+        """청크와 임베딩을 페이지 단위 RPC로 document_sections에 저장합니다."""
+        filename = job.filename
+        logger.info(f"Number of records to insert for {filename}: {len(job.chunks)}")
+
+        async def report_page(done: int, total: int):
+            await self._set_upload_progress(filename, 80 + 20 * done // total, f"DB Updating ({done}/{total})")
+
+        db_client = self._postgrest_client_for_token(job.access_token)
+        if job.chunks:
+            inserted = await write_sections(
+                db_client, job.document_id, job.chunks, job.embeddings, report_page, job.section_ids,
+                job.collection_id,
+            )
+            logger.info(f"Inserted {inserted} sections for {filename}")
+        else:
+            logger.info(f"No records to insert for {filename}")
+
+        if job.stale_section_ids:
+            # 새 청크를 먼저 저장한 뒤 지우므로 갱신 중에도 문서가 검색에서 빠지지 않습니다.
+            deleted = await asyncio.to_thread(delete_sections, db_client, job.document_id, job.stale_section_ids)
+            logger.info(f"Deleted {deleted} stale sections for {filename}")
+
+        await self._update_document_status(job, STATUS_INDEXED, chunk_count=job.chunk_count)
+        invalidate_documents(job.collection_id, [job.document_id])
+        invalidate_collection_results(job.collection_id)
+
+        if job.replaced_storage_path:
+            try:
+                storage_client = self._async_storage_client_for_token(job.access_token)
+                await storage_client.from_(BUCKET_NAME).remove([_storage_object_path(job.replaced_storage_path)])
+            except Exception:
+                logger.exception(f"Failed to remove previous version of {filename} from storage")
+
+        job.chunks, job.embeddings = [], []
+        job.completed = True
+        await self._set_upload_progress(filename, 100, "✅ 갱신 완료" if job.is_update else "✅ 완료")
+        return job
 
     async def delete_document(self, doc_id: str):
         """문서를 삭제합니다: 스토리지에서 파일 삭제 후 DB에서 레코드 삭제."""
@@ -325,7 +494,7 @@ class DocumentState(BaseState):
             db_client = await self._get_authenticated_client()
 
             # 먼저 문서 정보 가져오기 (storage_path 필요)
-            response = db_client.from_("documents").select("storage_path, owner_id").eq("id", doc_id).execute()
+            response = await db_client.from_("documents").select("storage_path, owner_id, collection_id").eq("id", doc_id).execute()
             if not response.data:
                 raise Exception("문서를 찾을 수 없습니다.")
 
@@ -333,23 +502,19 @@ class DocumentState(BaseState):
             if doc_data["owner_id"] != auth_state.user.id:
                 raise Exception("삭제 권한이 없습니다.")
 
-            storage_path = doc_data["storage_path"]
-
-            # 만약 storage_path가 버킷 이름을 포함하고 있다면 제거 (호환성을 위해)
-            if storage_path.startswith(f"{BUCKET_NAME}/"):
-                path_to_remove = storage_path[len(f"{BUCKET_NAME}/"):]
-            else:
-                path_to_remove = storage_path
+            path_to_remove = _storage_object_path(doc_data["storage_path"])
 
             # 스토리지에서 파일 삭제
-            supabase_client = await self._get_supabase_client()
-            storage_response = supabase_client.storage.from_(BUCKET_NAME).remove([path_to_remove])
+            storage_client = await self._get_storage_client()
+            storage_response = await storage_client.from_(BUCKET_NAME).remove([path_to_remove])
             # 삭제 응답 확인: []이면 삭제되지 않음 (경로가 잘못된 경우)
             if not storage_response:
                 raise Exception("스토리지 파일 삭제 실패: 파일을 찾을 수 없음 또는 경로 오류.")
 
             # DB에서 레코드 삭제
-            db_client.from_("documents").delete().eq("id", doc_id).execute()
+            await db_client.from_("documents").delete().eq("id", doc_id).execute()
+            invalidate_documents(doc_data["collection_id"], [doc_id])
+            invalidate_collection_results(doc_data["collection_id"])
 
             # 상태 업데이트: 목록에서 제거
             self.documents = [doc for doc in self.documents if doc["id"] != doc_id]
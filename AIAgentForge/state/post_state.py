@@ -1,14 +1,19 @@
 # AIAgentForge/state/post_state.py
+import os
+import asyncio
 import reflex as rx
 from .base import BaseState
 from .auth_state import AuthState
 from typing import Optional, Dict, Any
-from postgrest import SyncPostgrestClient
+from postgrest import AsyncPostgrestClient
 
 import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 import datetime
 
+# 게시판 목록에서 한 번에 불러올 글 수
+POSTS_PAGE_SIZE = int(os.getenv("POSTS_PAGE_SIZE", "20"))
+
 class PostState(BaseState):
     """게시판별 게시글 관리(CRUD, 검색)를 위한 상태"""
 
@@ -18,8 +23,19 @@ class PostState(BaseState):
     board_name: str = ""
     board_description: str = ""
 
-    # 게시글 목록
+    # 게시글 목록 (목록용 열과 미리보기만 담고, 본문은 상세 페이지에서 불러옵니다)
     posts: list[dict] = []
+    has_more_posts: bool = False
+    is_loading_more: bool = False
+
+    # 목록이 검색 결과인지 (검색 결과에는 강조된 제목과 스니펫이 들어 있습니다)
+    is_search_result: bool = False
+
+    # 다음 페이지를 읽을 커서: 마지막으로 불러온 글의 (created_at, id)
+    _posts_cursor: Optional[dict] = None
+    # 현재 검색 결과의 검색어와 다음 페이지 위치. 입력창이 바뀌어도 같은 검색의 다음 페이지를 읽습니다.
+    _search_text: str = ""
+    _search_offset: int = 0
 
     # UI 상태
     is_loading: bool = False
@@ -70,7 +86,7 @@ class PostState(BaseState):
 
         try:
             # 게시판 정보는 보통 공개되어 있으므로 익명 클라이언트를 사용해도 괜찮습니다.
-            board_res = self.supabase_client.from_("boards").select("name").eq("id", self.curr_board_id).single().execute()
+            board_res = await self._anon_client().from_("boards").select("name").eq("id", self.curr_board_id).single().execute()
             if board_res.data:
                 self.board_name = board_res.data.get("name", "알 수 없는 게시판")
             else:
@@ -79,11 +95,45 @@ class PostState(BaseState):
             logging.error(f"Error loading board details: {e}")
         yield
         
+    async def _fetch_posts_page(self, db_client: AsyncPostgrestClient, cursor: Optional[dict]) -> list[dict]:
+        """커서 다음의 게시글 한 페이지를 keyset 페이지네이션으로 가져오고 다음 커서를 기록합니다."""
+        # 다음 페이지가 있는지 알기 위해 한 개를 더 요청합니다.
+        response = await db_client.rpc("list_board_posts", {
+            "p_board_id": self.curr_board_id,
+            "p_before_created_at": cursor["created_at"] if cursor else None,
+            "p_before_id": cursor["id"] if cursor else None,
+            "page_size": POSTS_PAGE_SIZE + 1,
+        }).execute()
+        rows = response.data or []
+        self.has_more_posts = len(rows) > POSTS_PAGE_SIZE
+        rows = rows[:POSTS_PAGE_SIZE]
+        if rows:
+            self._posts_cursor = {"created_at": rows[-1]["created_at"], "id": rows[-1]["id"]}
+        return rows
+
+    async def _fetch_search_page(self, db_client: AsyncPostgrestClient) -> list[dict]:
+        """search_posts RPC로 검색 결과 한 페이지를 점수순으로 가져옵니다."""
+        response = await db_client.rpc("search_posts", {
+            "query_text": self._search_text,
+            "p_board_id": self.curr_board_id,
+            "page_size": POSTS_PAGE_SIZE + 1,
+            "page_offset": self._search_offset,
+        }).execute()
+        rows = response.data or []
+        self.has_more_posts = len(rows) > POSTS_PAGE_SIZE
+        rows = rows[:POSTS_PAGE_SIZE]
+        self._search_offset += len(rows)
+        return rows
+
     async def load_board_and_posts(self):
         """페이지 로드 시 게시판 정보와 게시글 목록을 함께 불러옵니다."""
         self.curr_board_id = self.router.page.params.get("board_id")
         logging.info(f"Loading board with ID: {self.curr_board_id}")
         self.is_loading = True
+        self.posts = []
+        self.has_more_posts = False
+        self.is_search_result = False
+        self._posts_cursor = None
         yield
 
         if not self.curr_board_id:
@@ -97,14 +147,14 @@ class PostState(BaseState):
             # RLS 정책을 통과하기 위해 인증된 클라이언트를 가져옵니다.
             db_client = await self._get_authenticated_client()
 
-            # 게시판 정보 조회 (인증된 클라이언트 사용)
-            board_res = db_client.from_("boards").select("*").eq("id", self.curr_board_id).single().execute()
+            # 게시판 정보와 게시글 첫 페이지는 서로 독립적이므로 동시에 조회합니다. (인증된 클라이언트 사용)
+            board_res, posts = await asyncio.gather(
+                db_client.from_("boards").select("*").eq("id", self.curr_board_id).single().execute(),
+                self._fetch_posts_page(db_client, None),
+            )
             self.board_name = board_res.data.get("name", "알 수 없는 게시판")
             self.board_description = board_res.data.get("description", "")
-
-            # 게시글 목록 조회 (인증된 클라이언트 사용)
-            posts_res = db_client.from_("posts").select("*").eq("board_id", self.curr_board_id).order("created_at", desc=True).execute()
-            self.posts = posts_res.data
+            self.posts = posts
             logging.info(f"Loaded {len(self.posts)} posts.") # 로드된 게시글 수 로그 추가
 
         except Exception as e:
@@ -113,23 +163,41 @@ class PostState(BaseState):
             self.is_loading = False
             yield
 
+    async def load_more_posts(self):
+        """목록(또는 검색 결과)의 다음 페이지를 불러와 뒤에 붙입니다."""
+        if not self.has_more_posts or self.is_loading_more:
+            return
+        if not self.is_search_result and not self._posts_cursor:
+            return
+        self.is_loading_more = True
+        yield
+        try:
+            db_client = await self._get_authenticated_client()
+            if self.is_search_result:
+                self.posts = self.posts + await self._fetch_search_page(db_client)
+            else:
+                self.posts = self.posts + await self._fetch_posts_page(db_client, self._posts_cursor)
+        except Exception as e:
+            logging.info(f"Error loading more posts: {e}")
+        finally:
+            self.is_loading_more = False
+            yield
+
     async def handle_search(self):
-        """현재 게시판 내에서 게시글을 검색합니다."""
-        if not self.search_query.strip():
+        """현재 게시판 내에서 게시글을 검색합니다. (PGroonga 인덱스를 쓰는 search_posts RPC, 점수순)"""
+        if not (self.search_query or "").strip():
             yield PostState.load_board_and_posts
             return
 
         self.is_loading = True
         yield
         try:
-            # --- [수정된 부분] ---
-            # 검색 시에도 인증된 클라이언트를 사용합니다.
+            # 검색 시에도 인증된 클라이언트를 사용합니다. 검색어는 RPC 파라미터로만 전달합니다.
             db_client = await self._get_authenticated_client()
-            response = db_client.from_("posts").select("*") \
-                .eq("board_id", self.curr_board_id) \
-                .or_(f"title.ilike.%{self.search_query}%,content.ilike.%{self.search_query}%") \
-                .order("created_at", desc=True).execute()
-            self.posts = response.data
+            self._search_text = self.search_query.strip()
+            self._search_offset = 0
+            self.posts = await self._fetch_search_page(db_client)
+            self.is_search_result = True
         except Exception as e:
             logging.info(f"Error searching posts: {e}")
         finally:
@@ -147,7 +215,7 @@ class PostState(BaseState):
             user_id = auth_state.user.id
             
             db_client = await self._get_authenticated_client()
-            db_client.from_("posts").insert({
+            await db_client.from_("posts").insert({
                 "title": self.title,
                 "content": self.content,
                 "board_id": self.curr_board_id,
@@ -209,11 +277,11 @@ class PostDetailState(BaseState):
         return self.user.id == self.post.get("user_id")
 
 
-    async def load_comments(self, db_client):
+    async def load_comments(self, db_client: AsyncPostgrestClient):
         """게시물에 달린 댓글 목록을 불러오고 날짜를 포맷팅합니다."""
         logging.info("Entering load_comments")
         try:
-            comments_res = db_client.from_("comments").select("*").eq("post_id", self.current_post_id).order("created_at", desc=True).execute()
+            comments_res = await db_client.from_("comments").select("*").eq("post_id", self.current_post_id).order("created_at", desc=True).execute()
             
             formatted_comments = []
             for comment in comments_res.data:
@@ -257,13 +325,17 @@ class PostDetailState(BaseState):
             # --- [수정된 부분] ---
             # 상세 정보 조회 시에도 인증된 클라이언트를 사용합니다.
             db_client = await self._get_authenticated_client()
-            response = db_client.from_("posts").select("*").eq("id", self.current_post_id).single().execute()
+            # 게시글과 댓글은 post_id만 있으면 조회할 수 있으므로 동시에 불러옵니다.
+            logging.info("Calling load_comments")
+            response, _ = await asyncio.gather(
+                db_client.from_("posts").select("*").eq("id", self.current_post_id).single().execute(),
+                self.load_comments(db_client),
+            )
             if response.data:
                 self.post = response.data
-                logging.info("Calling load_comments")
-                await self.load_comments(db_client)
             else :
                 self.post = {}
+                self.comments = []
         except Exception as e:
             logging.info(f"Error loading post detail: {e}")
         finally:
@@ -280,7 +352,7 @@ class PostDetailState(BaseState):
 
         try:
             client = await self._get_authenticated_client()
-            client.from_("posts").delete().eq("id", self.current_post_id).execute()
+            await client.from_("posts").delete().eq("id", self.current_post_id).execute()
             
             if board_id:
                 return rx.redirect(f"/boards/{board_id}")
@@ -301,7 +373,7 @@ class PostDetailState(BaseState):
 
         try:
             client = await self._get_authenticated_client()
-            client.from_("posts").update({
+            await client.from_("posts").update({
                 "title": form_data["title"],
                 "content": form_data["content"],
             }).eq("id", self.current_post_id).execute()
@@ -325,7 +397,7 @@ class PostDetailState(BaseState):
 
             db_client = await self._get_authenticated_client()
                         
-            db_client.from_("comments").insert({
+            await db_client.from_("comments").insert({
                 "content": content,
                 "post_id": self.current_post_id,
                 "user_id": auth_state.user.id,
@@ -344,7 +416,7 @@ class PostDetailState(BaseState):
         try:
             db_client = await self._get_authenticated_client()
 
-            db_client.from_("comments").delete().eq("id", comment_id).execute()
+            await db_client.from_("comments").delete().eq("id", comment_id).execute()
             logging.info("Calling load_comments")
             await self.load_comments(db_client)
         except Exception as e:
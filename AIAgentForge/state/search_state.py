@@ -1,40 +1,49 @@
 # AIAgentForge/state/search_state.py
-import os
+import time
+import logging
 import reflex as rx
 from .base import BaseState
 from .document_state import DocumentState
 from .auth_state import AuthState
-from openai import AsyncOpenAI
-from ..utils.embedder import generate_embeddings
+from ..utils.hybrid_search import search_sections
+from ..utils.answer_generation import NO_CONTEXT_ANSWER, stream_answer
 
-# 환경 변수에서 OpenAI API 키를 가져와 클라이언트를 초기화합니다.
-client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+logger = logging.getLogger(__name__)
+
+# 답변 토큰을 모아 UI에 반영하는 간격(초). 토큰마다 상태를 보내면 웹소켓 메시지가 너무 많아집니다.
+ANSWER_FLUSH_INTERVAL_SECONDS = 0.05
 
 class SearchState(BaseState):
     search_query: str = ""
     is_loading: bool = False
+    # 검색(임베딩 + 하이브리드 검색) 중인지. 검색 결과가 나오면 답변 생성 중에도 결과를 먼저 보여줍니다.
+    is_retrieving: bool = False
     search_results: list[dict] = []
     # LLM의 최종 답변을 저장할 상태 변수 추가
     llm_answer: str = ""
+    # 검색 시작부터 검색 결과 / 답변 첫 토큰까지 걸린 시간(ms)
+    retrieval_ms: int = 0
+    ttft_ms: int = 0
 
-    async def handle_search(self):
-        if not self.search_query.strip():
-            return
-        
-        print("handle_search: ", self.search_query)
+    # 가장 최근에 시작한 검색의 번호. 새 검색이 시작되면 이전 검색은 다음 반영 시점에 스스로 멈춥니다.
+    _search_generation: int = 0
 
-        self.is_loading = True
-        # 이전 검색 결과와 답변을 초기화합니다.
-        self.search_results = []
-        self.llm_answer = ""
-        yield
+    @rx.event(background=True)
+    async def handle_search(self):
+        async with self:
+            query = self.search_query.strip()
+            if not query:
+                return
+            self._search_generation += 1
+            generation = self._search_generation
 
-        try:
-            # Step 1: 쿼리 임베딩 생성
-            embeddings_list = await generate_embeddings([self.search_query])
-            if not embeddings_list:
-                raise ValueError("임베딩 생성에 실패했습니다.")
-            query_embedding = embeddings_list[0]
+            self.is_loading = True
+            self.is_retrieving = True
+            # 이전 검색 결과와 답변을 초기화합니다.
+            self.search_results = []
+            self.llm_answer = ""
+            self.retrieval_ms = 0
+            self.ttft_ms = 0
 
             auth_state = await self.get_state(AuthState)
             if not auth_state.user:
@@ -42,67 +51,71 @@ class SearchState(BaseState):
                 self.alert_message = "사용자를 찾을 수 없습니다."
                 self.show_alert = True
                 self.is_loading = False
-                yield
+                self.is_retrieving = False
                 return
             user_id = auth_state.user.id
-
             doc_state = await self.get_state(DocumentState)
+            collection_id = doc_state.collection_id
+            access_token = auth_state.access_token
 
-            # Step 2: 데이터베이스에서 관련 문서 검색
-            response = self.supabase_client.rpc(
-                "hybrid_search_multilingual",
-                params={
-                    "query_text": self.search_query,
-                    "query_embedding": query_embedding,
-                    "p_collection_id": doc_state.collection_id,
-                    "p_owner_id": user_id,
-                    "match_count": 5,  # 컨텍스트 길이를 고려하여 5개로 조정
-                }
-            ).execute()
-            
-            self.search_results = response.data
+        print("handle_search: ", query)
+        started = time.perf_counter()
+        answer = ""
+        try:
+            # Step 1-2: 관련 문서 검색. 같은 검색은 결과 캐시에서, 반복 질의는 질의 임베딩 캐시에서 가져오고
+            # 로컬 인덱스를 쓰면 의미 검색은 메모리에서, 아니면 데이터베이스 RPC로 처리합니다.
+            results = await search_sections(
+                access_token, collection_id, user_id, query,
+                match_count=5,  # 컨텍스트 길이를 고려하여 5개로 조정
+            )
+            async with self:
+                if self._search_generation != generation:
+                    return
+                # 답변을 기다리지 않고 검색 결과를 먼저 보여줍니다.
+                self.search_results = results
+                self.is_retrieving = False
+                self.retrieval_ms = int((time.perf_counter() - started) * 1000)
+                if not results:
+                    self.llm_answer = NO_CONTEXT_ANSWER
+                    return
 
-            # Step 3: 검색된 문서를 기반으로 LLM에 질문
-            if self.search_results:
-                # 검색된 문서의 내용을 컨텍스트로 조합
-                context = "\n\n---\n\n".join([item['content'] for item in self.search_results])
-                
-                # LLM에 전달할 프롬프트 구성
-                prompt_message = f"""
-                당신은 주어진 컨텍스트를 기반으로 사용자의 질문에 답변하는 AI 어시스턴트입니다.
-                오직 제공된 컨텍스트만을 사용하여 답변을 생성해야 합니다.
-                만약 컨텍스트에 답변에 대한 정보가 없다면, "제공된 문서에서 답변을 찾을 수 없습니다."라고 답변하세요.
-                
-                컨텍스트:
-                {context}
-                
-                질문:
-                {self.search_query}
-                
-                답변:
-                """
+            # Step 3: 검색된 문서를 기반으로 LLM 답변을 스트리밍합니다. 토큰은 모아서 일정 간격으로 반영합니다.
+            last_flush = time.perf_counter()
+            pending = False
+            first_token = True
+            stream = stream_answer(query, results)
+            try:
+                async for delta in stream:
+                    answer += delta
+                    pending = True
+                    now = time.perf_counter()
+                    if first_token or now - last_flush >= ANSWER_FLUSH_INTERVAL_SECONDS:
+                        async with self:
+                            if self._search_generation != generation:
+                                # 새 검색이 시작되었으므로 남은 생성을 취소합니다.
+                                return
+                            if first_token:
+                                self.ttft_ms = int((now - started) * 1000)
+                                logger.info(f"Search answer TTFT {self.ttft_ms} ms (retrieval {self.retrieval_ms} ms)")
+                            self.llm_answer = answer
+                        last_flush = now
+                        pending = False
+                        first_token = False
+            finally:
+                await stream.aclose()
 
-                # OpenAI API 호출
-                chat_completion = await client.chat.completions.create(
-                    model="gpt-4o",  # 원하는 모델로 변경 가능
-                    messages=[
-                        {"role": "system", "content": "You are a helpful AI assistant that answers questions based on the provided context in Korean."},
-                        {"role": "user", "content": prompt_message},
-                    ],
-                    temperature=0.5,
-                )
-                
-                if chat_completion.choices:
-                    self.llm_answer = chat_completion.choices[0].message.content
-                else:
-                    self.llm_answer = "답변을 생성하지 못했습니다."
-            else:
-                self.llm_answer = "관련 문서를 찾지 못해 답변을 생성할 수 없습니다."
+            async with self:
+                if self._search_generation == generation and (pending or not answer):
+                    self.llm_answer = answer or "답변을 생성하지 못했습니다."
 
         except Exception as e:
             print(f"Search and answer generation failed: {e}")
-            self.llm_answer = f"오류가 발생했습니다: {e}"
-            self.search_results = []
+            async with self:
+                if self._search_generation == generation:
+                    self.llm_answer = f"오류가 발생했습니다: {e}"
+                    self.search_results = []
         finally:
-            self.is_loading = False
-            yield
\ No newline at end of file
+            async with self:
+                if self._search_generation == generation:
+                    self.is_loading = False
+                    self.is_retrieving = False
@@ -0,0 +1,52 @@
+# AIAgentForge/utils/answer_generation.py
+import os
+from typing import AsyncIterator
+from openai import AsyncOpenAI
+
+# 환경 변수에서 OpenAI API 키를 가져와 클라이언트를 초기화합니다.
+client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+
+ANSWER_MODEL = os.getenv("ANSWER_MODEL", "gpt-4o")
+NO_CONTEXT_ANSWER = "관련 문서를 찾지 못해 답변을 생성할 수 없습니다."
+
+def build_answer_messages(query: str, results: list[dict]) -> list[dict]:
+    """검색된 청크를 컨텍스트로 하는 답변 생성 프롬프트를 만듭니다."""
+    # 검색된 문서의 내용을 컨텍스트로 조합
+    context = "\n\n---\n\n".join([item['content'] for item in results])
+
+    # LLM에 전달할 프롬프트 구성
+    prompt_message = f"""
+    당신은 주어진 컨텍스트를 기반으로 사용자의 질문에 답변하는 AI 어시스턴트입니다.
+    오직 제공된 컨텍스트만을 사용하여 답변을 생성해야 합니다.
+    만약 컨텍스트에 답변에 대한 정보가 없다면, "제공된 문서에서 답변을 찾을 수 없습니다."라고 답변하세요.
+
+    컨텍스트:
+    {context}
+
+    질문:
+    {query}
+
+    답변:
+    """
+    return [
+        {"role": "system", "content": "You are a helpful AI assistant that answers questions based on the provided context in Korean."},
+        {"role": "user", "content": prompt_message},
+    ]
+
+async def stream_answer(query: str, results: list[dict]) -> AsyncIterator[str]:
+    """검색 결과를 근거로 한 답변을 토큰 조각 단위로 생성합니다.
+
+    호출하는 쪽에서 반복을 중단하면(aclose) OpenAI 스트림도 닫혀 남은 토큰 생성이 취소됩니다.
+    """
+    stream = await client.chat.completions.create(
+        model=ANSWER_MODEL,
+        messages=build_answer_messages(query, results),
+        temperature=0.5,
+        stream=True,
+    )
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()
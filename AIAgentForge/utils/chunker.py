@@ -1,16 +1,71 @@
 # langconnect_fullstack/utils/chunker.py
+from bisect import bisect_right
+from typing import Iterable, Iterator
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-def chunk_text(text: str) -> list[dict]:
-    """LangChain을 사용하여 텍스트를 의미 있는 청크로 분할합니다."""
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,  # 각 청크의 최대 크기
-        chunk_overlap=200,  # 청크 간의 중복되는 문자 수
+CHUNK_SIZE = 1000  # 각 청크의 최대 크기
+CHUNK_OVERLAP = 200  # 청크 간의 중복되는 문자 수
+# 스트림 청킹 시 버퍼가 이 크기를 넘으면 확정된 청크를 내보냅니다.
+STREAM_FLUSH_CHARS = CHUNK_SIZE * 8
+
+def _make_splitter(add_start_index: bool = False) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
         length_function=len,
         is_separator_regex=False,
+        add_start_index=add_start_index,
     )
+
+def chunk_text(text: str) -> list[dict]:
+    """LangChain을 사용하여 텍스트를 의미 있는 청크로 분할합니다."""
+    text_splitter = _make_splitter()
     # split_text는 문자열 리스트를 반환합니다.
     chunks_text = text_splitter.split_text(text)
     # 파이프라인의 다른 부분에서 사용하기 쉽도록 딕셔너리 리스트로 변환합니다.
     chunks = [{"text": chunk} for chunk in chunks_text]
     return chunks
+
+def chunk_text_stream(blocks: Iterable[tuple[int | None, str]]) -> Iterator[dict]:
+    """(페이지 번호, 텍스트) 스트림을 받아 청크를 점진적으로 생성합니다.
+
+    버퍼에는 아직 확정되지 않은 마지막 청크 이후의 텍스트만 남기므로
+    메모리 사용량은 문서 전체가 아닌 몇 페이지 분량으로 제한됩니다.
+    각 청크에는 청크가 시작되는 페이지 번호("page")가 함께 담깁니다. 페이지가 없는 텍스트 파일은 None입니다.
+    """
+    text_splitter = _make_splitter(add_start_index=True)
+    buffer = ""
+    offsets: list[int] = []  # 버퍼 내 각 페이지의 시작 위치
+    pages: list[int | None] = []
+
+    def page_at(position: int) -> int | None:
+        index = bisect_right(offsets, position) - 1
+        return pages[index] if index >= 0 else None
+
+    for page, text in blocks:
+        if not text:
+            continue
+        offsets.append(len(buffer))
+        pages.append(page)
+        buffer += text
+        if len(buffer) < STREAM_FLUSH_CHARS:
+            continue
+
+        docs = text_splitter.create_documents([buffer])
+        if len(docs) < 2:
+            continue
+        # 마지막 청크는 다음 페이지 텍스트와 이어질 수 있으므로 버퍼에 남겨 둡니다.
+        keep_from = docs[-1].metadata["start_index"]
+        if keep_from <= 0:
+            continue
+        for doc in docs[:-1]:
+            yield {"text": doc.page_content, "page": page_at(doc.metadata["start_index"])}
+
+        first_kept = max(bisect_right(offsets, keep_from) - 1, 0)
+        pages = pages[first_kept:]
+        offsets = [max(offset - keep_from, 0) for offset in offsets[first_kept:]]
+        buffer = buffer[keep_from:]
+
+    if buffer:
+        for doc in text_splitter.create_documents([buffer]):
+            yield {"text": doc.page_content, "page": page_at(doc.metadata["start_index"])}
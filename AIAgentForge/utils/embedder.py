@@ -1,27 +1,63 @@
 # langconnect_fullstack/utils/embedder.py
 import os
-from openai import AsyncOpenAI
+import logging
+from .embedding_cache import embedding_cache, make_cache_key
+from .embedding_providers import EmbeddingError, get_embedding_provider
 
-# 환경 변수에서 OpenAI API 키를 가져와 클라이언트를 초기화합니다.
-client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+logger = logging.getLogger(__name__)
 
-async def generate_embeddings(texts: list[str]) -> list[list[float]]:
-    """OpenAI API를 사용하여 텍스트 목록에 대한 임베딩을 비동기적으로 생성합니다."""
+# 배포 전체의 기본 임베딩 차원. 설정하지 않으면 임베딩 모델의 전체 차원을 사용합니다.
+# 컬렉션별 설정(collections.embedding_dimensions)이 있으면 그 값을 사용합니다.
+_EMBEDDING_DIMENSIONS_ENV = os.getenv("EMBEDDING_DIMENSIONS")
+
+def get_embedding_model() -> str:
+    """현재 임베딩 모델 이름. document_sections.embedding_model에 기록됩니다."""
+    return get_embedding_provider().name
+
+def default_dimensions() -> int:
+    """배포 기본 임베딩 차원을 반환합니다."""
+    if _EMBEDDING_DIMENSIONS_ENV:
+        return int(_EMBEDDING_DIMENSIONS_ENV)
+    return get_embedding_provider().dimensions
+
+async def generate_embeddings(texts: list[str], dimensions: int | None = None) -> list[list[float]]:
+    """설정된 임베딩 백엔드(EMBEDDING_PROVIDER)로 텍스트 목록의 임베딩을 비동기적으로 생성합니다.
+
+    dimensions를 생략하면 배포 기본값을 사용합니다.
+    같은 요청 안의 중복 텍스트는 한 번만 처리하고, 이전에 임베딩한 텍스트는
+    (모델, 차원, sha256) 키로 캐시에서 가져옵니다. 나머지 입력만 백엔드로 보냅니다.
+    반환 순서는 입력 순서와 같고, 실패 시 EmbeddingError를 발생시킵니다.
+    """
     if not texts:
         # texts가 비어있을 경우 None 대신 빈 리스트를 반환하는 것이 더 일관성 있습니다.
         return []
 
-    try:
-        # 임베딩 API를 비동기적으로 호출합니다.
-        res = await client.embeddings.create(
-            input=texts,
-            model="text-embedding-3-small"
-        )
-        # 응답에서 임베딩 데이터만 추출하여 반환합니다.
-        embeddings = [record.embedding for record in res.data]
-        return embeddings
-    except Exception as e:
-        print(f"임베딩 생성 중 오류 발생: {e}")
-        # 실제 애플리케이션에서는 더 정교한 오류 처리가 필요합니다.
-        # 오류 발생 시, 입력된 텍스트 수만큼 빈 리스트를 반환합니다.
-        return [[] for _ in texts]
\ No newline at end of file
+    provider = get_embedding_provider()
+    dimensions = dimensions or default_dimensions()
+    if dimensions > provider.dimensions:
+        raise EmbeddingError(f"{provider.name} 모델은 최대 {provider.dimensions}차원까지 지원합니다. (요청: {dimensions})")
+
+    keys = [make_cache_key(provider.name, dimensions, text) for text in texts]
+    unique_texts: dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        unique_texts.setdefault(key, text)
+
+    vectors: dict[str, list[float]] = {}
+    if embedding_cache is not None:
+        embedding_cache.deduplicated += len(texts) - len(unique_texts)
+        try:
+            vectors = await embedding_cache.get_many(list(unique_texts))
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+
+    missing = [key for key in unique_texts if key not in vectors]
+    if missing:
+        new_vectors = dict(zip(missing, await provider.embed([unique_texts[key] for key in missing], dimensions)))
+        if embedding_cache is not None:
+            try:
+                await embedding_cache.put_many(new_vectors)
+            except Exception as e:
+                logger.warning(f"Embedding cache store failed: {e}")
+        vectors.update(new_vectors)
+
+    return [vectors[key] for key in keys]
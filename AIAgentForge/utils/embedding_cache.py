@@ -0,0 +1,154 @@
+# AIAgentForge/utils/embedding_cache.py
+import os
+import time
+import sqlite3
+import hashlib
+import asyncio
+import logging
+import threading
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# 빈 문자열로 설정하면 캐시를 사용하지 않습니다.
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+# 용량을 넘으면 전체의 이 비율만큼 오래 사용되지 않은 항목을 한 번에 지웁니다.
+EVICT_FRACTION = 0.1
+
+def make_cache_key(model: str, dimensions: int, text: str) -> str:
+    """(모델, 차원, 청크 텍스트의 sha256)으로 캐시 키를 만듭니다."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model}:{dimensions}:{digest}"
+
+class EmbeddingCache:
+    """SQLite에 float32 벡터를 저장하는 크기 제한 LRU 임베딩 캐시입니다.
+
+    DB 작업은 동기 sqlite3 호출이므로 비동기 메서드는 스레드에서 실행합니다.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._total_bytes: int | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " vector BLOB NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used_idx ON embeddings(last_used)")
+            self._total_bytes = conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def _get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            conn = self._connect()
+            # SQLite 변수 개수 제한을 넘지 않도록 나누어 조회합니다.
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def _put_many(self, items: dict[str, list[float]]):
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+        with self._lock:
+            conn = self._connect()
+            # 이미 있는 키는 덮어쓰므로 기존 크기를 빼야 전체 크기가 두 번 더해지지 않습니다.
+            replaced_bytes = 0
+            keys = [key for key, _, _ in rows]
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                replaced_bytes += conn.execute(
+                    f"SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            conn.commit()
+            self._total_bytes += sum(len(blob) for _, blob, _ in rows) - replaced_bytes
+            if self._total_bytes > self.max_bytes:
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """가장 오래 사용되지 않은 항목부터 지워 용량 한도 아래로 맞춥니다."""
+        deleted = 0
+        while self._total_bytes > self.max_bytes:
+            count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count == 0:
+                break
+            to_delete = max(int(count * EVICT_FRACTION), 1)
+            conn.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                " SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (to_delete,),
+            )
+            deleted += to_delete
+            self._total_bytes = conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()[0]
+        conn.commit()
+        logger.info(f"Embedding cache evicted {deleted} entries ({self._total_bytes} bytes left).")
+
+    async def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """키 목록 중 캐시에 있는 벡터를 반환합니다."""
+        if not keys:
+            return {}
+        return await asyncio.to_thread(self._get_many, keys)
+
+    async def put_many(self, items: dict[str, list[float]]):
+        """새로 생성한 벡터를 캐시에 저장합니다."""
+        await asyncio.to_thread(self._put_many, items)
+
+    def stats(self) -> dict:
+        """적중률 등 캐시 통계를 반환합니다."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "deduplicated": self.deduplicated,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size_bytes": self._total_bytes or 0,
+            "max_bytes": self.max_bytes,
+        }
+
+embedding_cache: EmbeddingCache | None = (
+    EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_MB * 1024 * 1024)
+    if EMBEDDING_CACHE_PATH else None
+)
@@ -0,0 +1,252 @@
+# AIAgentForge/utils/embedding_providers.py
+import os
+import re
+import random
+import asyncio
+import hashlib
+import logging
+import numpy as np
+import tiktoken
+from openai import (
+    AsyncOpenAI,
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    RateLimitError,
+)
+
+logger = logging.getLogger(__name__)
+
+# 사용할 임베딩 백엔드: "openai"(기본값), "local"(sentence-transformers CPU 모델), "hashing"(테스트용 결정적 가짜)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+
+class EmbeddingError(Exception):
+    """재시도 후에도 임베딩 생성에 실패한 경우 발생합니다."""
+
+class EmbeddingProvider:
+    """임베딩 백엔드의 공통 인터페이스입니다.
+
+    name은 document_sections.embedding_model에 기록되고 임베딩 캐시 키에도 쓰이므로,
+    같은 벡터 공간을 만드는 모델만 같은 이름을 가져야 합니다.
+    """
+    name: str
+    dimensions: int  # 모델이 만드는 전체 차원
+
+    async def embed(self, texts: list[str], dimensions: int) -> list[list[float]]:
+        """텍스트 목록을 dimensions 차원 벡터로 변환합니다. 반환 순서는 입력 순서와 같습니다."""
+        raise NotImplementedError
+
+def _truncate(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    """앞쪽 차원만 남기고 다시 정규화합니다. (Matryoshka 방식의 차원 축소)"""
+    if dimensions >= vectors.shape[1]:
+        return vectors
+    reduced = vectors[:, :dimensions]
+    norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+    return reduced / np.where(norms == 0, 1, norms)
+
+# --- OpenAI ---
+
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+OPENAI_MODEL_DIMENSIONS = {"text-embedding-3-small": 1536, "text-embedding-3-large": 3072}
+
+# OpenAI 임베딩 API의 요청 한도보다 약간 작게 잡아 배치를 나눕니다.
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = int(os.getenv("EMBEDDING_MAX_TOKENS_PER_REQUEST", "250000"))
+MAX_TOKENS_PER_INPUT = 8191
+
+# 동시에 진행할 임베딩 요청 수와 재시도 정책
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 20.0
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (RateLimitError, APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Retry-After 헤더가 있으면 따르고, 없으면 지수 백오프에 지터를 더합니다."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+def _make_batches(token_counts: list[int]) -> list[range]:
+    """입력 수와 토큰 수 한도를 모두 지키도록 연속된 인덱스 구간으로 나눕니다."""
+    batches = []
+    start = 0
+    batch_tokens = 0
+    for i, count in enumerate(token_counts):
+        batch_size = i - start
+        if batch_size and (batch_size >= MAX_INPUTS_PER_REQUEST or batch_tokens + count > MAX_TOKENS_PER_REQUEST):
+            batches.append(range(start, i))
+            start, batch_tokens = i, 0
+        batch_tokens += count
+    if start < len(token_counts):
+        batches.append(range(start, len(token_counts)))
+    return batches
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI 임베딩 API. 토큰 수 기준 배치, 제한된 동시성, 지터가 있는 재시도로 호출합니다."""
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL):
+        self.name = model
+        self.dimensions = OPENAI_MODEL_DIMENSIONS.get(model, 1536)
+        # 재시도는 직접 처리하므로 SDK 자체 재시도는 끕니다.
+        self._client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"), max_retries=0)
+        self._encoding = None
+        self._encoding_unavailable = False
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def _get_encoding(self):
+        """토크나이저를 불러옵니다. 인코딩 파일을 받을 수 없는 환경에서는 None을 반환합니다."""
+        if self._encoding is None and not self._encoding_unavailable:
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.name)
+            except Exception as e:
+                logger.warning(f"tiktoken encoding unavailable ({e}); using byte length as token estimate.")
+                self._encoding_unavailable = True
+        return self._encoding
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+        return self._semaphore
+
+    def _prepare_input(self, text: str) -> tuple[str, int]:
+        """입력 한 건의 토큰 수를 세고, 모델 한도를 넘으면 잘라냅니다."""
+        encoding = self._get_encoding()
+        if encoding is not None:
+            tokens = encoding.encode(text, disallowed_special=())
+            if len(tokens) > MAX_TOKENS_PER_INPUT:
+                tokens = tokens[:MAX_TOKENS_PER_INPUT]
+                text = encoding.decode(tokens)
+            token_count = len(tokens)
+        else:
+            # 토큰 하나는 최소 1바이트이므로 UTF-8 바이트 수는 토큰 수의 상한입니다.
+            data = text.encode("utf-8")
+            if len(data) > MAX_TOKENS_PER_INPUT:
+                data = data[:MAX_TOKENS_PER_INPUT]
+                text = data.decode("utf-8", errors="ignore")
+            token_count = len(data)
+        # 빈 문자열은 API에서 거부되므로 공백 하나로 대체합니다.
+        return text or " ", max(token_count, 1)
+
+    async def _embed_batch(self, inputs: list[str], dimensions: int) -> list[list[float]]:
+        """한 배치를 임베딩합니다. 429/5xx/네트워크 오류는 재시도합니다."""
+        # 전체 차원은 파라미터 없이 요청하여 기존 동작과 같은 벡터를 받습니다.
+        extra = {"dimensions": dimensions} if dimensions != self.dimensions else {}
+        for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+            try:
+                async with self._get_semaphore():
+                    res = await self._client.embeddings.create(input=inputs, model=self.name, **extra)
+                # 응답 순서가 아닌 index 기준으로 정렬하여 입력 순서를 보장합니다.
+                return [record.embedding for record in sorted(res.data, key=lambda r: r.index)]
+            except Exception as e:
+                if not _is_retryable(e) or attempt == EMBEDDING_MAX_RETRIES:
+                    raise EmbeddingError(f"임베딩 생성 실패: {e}") from e
+                delay = _retry_delay(e, attempt)
+                logger.warning(f"Embedding request failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def embed(self, texts: list[str], dimensions: int) -> list[list[float]]:
+        prepared = [self._prepare_input(text) for text in texts]
+        inputs = [text for text, _ in prepared]
+        batches = _make_batches([count for _, count in prepared])
+
+        results = await asyncio.gather(
+            *(self._embed_batch(inputs[batch.start:batch.stop], dimensions) for batch in batches)
+        )
+        return [embedding for batch_result in results for embedding in batch_result]
+
+# --- 로컬 CPU 모델 ---
+
+# 한국어/영어를 함께 지원하는 768차원 모델을 기본값으로 합니다.
+LOCAL_EMBEDDING_MODEL = os.getenv(
+    "LOCAL_EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
+)
+# "torch" 또는 "onnx". onnx는 optimum[onnxruntime] 설치가 필요하며 CPU에서 더 빠릅니다.
+LOCAL_EMBEDDING_BACKEND = os.getenv("LOCAL_EMBEDDING_BACKEND", "torch")
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """sentence-transformers 모델을 프로세스 안에서 CPU로 실행합니다. 네트워크 왕복이 없습니다."""
+
+    def __init__(self, model: str = LOCAL_EMBEDDING_MODEL, backend: str = LOCAL_EMBEDDING_BACKEND):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_PROVIDER=local 을 사용하려면 sentence-transformers 패키지를 설치하세요."
+            ) from e
+        self.name = model
+        self._model = SentenceTransformer(model, device="cpu", backend=backend)
+        self.dimensions = self._model.get_sentence_embedding_dimension()
+        # 모델 추론은 CPU 코어를 모두 사용하므로 한 번에 하나씩 실행합니다.
+        self._lock: asyncio.Lock | None = None
+        logger.info(f"Local embedding model loaded: {model} ({backend}, {self.dimensions} dims)")
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        return self._model.encode(
+            texts,
+            batch_size=LOCAL_EMBEDDING_BATCH_SIZE,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        )
+
+    async def embed(self, texts: list[str], dimensions: int) -> list[list[float]]:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            vectors = await asyncio.to_thread(self._encode, texts)
+        return _truncate(vectors, dimensions).tolist()
+
+# --- 테스트용 결정적 가짜 ---
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """단어를 해시하여 차원에 더하는 결정적 임베딩입니다. 외부 호출 없이 테스트와 로컬 개발에 사용합니다.
+
+    같은 단어를 공유하는 텍스트끼리 가까워지므로 검색 흐름을 대략적으로 확인할 수 있습니다.
+    """
+
+    name = "hashing"
+    dimensions = 1536
+
+    @staticmethod
+    def _vector(text: str, dimensions: int) -> list[float]:
+        vector = np.zeros(dimensions, dtype=np.float32)
+        for token in _TOKEN_PATTERN.findall(text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % dimensions] += 1.0 if digest >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            # 영벡터는 코사인 거리가 정의되지 않으므로 고정된 단위 벡터를 사용합니다.
+            vector[0] = 1.0
+            return vector.tolist()
+        return (vector / norm).tolist()
+
+    async def embed(self, texts: list[str], dimensions: int) -> list[list[float]]:
+        return [self._vector(text, dimensions) for text in texts]
+
+_PROVIDERS = {
+    "openai": OpenAIEmbeddingProvider,
+    "local": LocalEmbeddingProvider,
+    "hashing": HashingEmbeddingProvider,
+}
+_provider: EmbeddingProvider | None = None
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """EMBEDDING_PROVIDER 설정에 맞는 백엔드를 처음 사용할 때 한 번만 생성합니다."""
+    global _provider
+    if _provider is None:
+        if EMBEDDING_PROVIDER not in _PROVIDERS:
+            raise ValueError(f"알 수 없는 EMBEDDING_PROVIDER: {EMBEDDING_PROVIDER!r} ({', '.join(_PROVIDERS)})")
+        _provider = _PROVIDERS[EMBEDDING_PROVIDER]()
+    return _provider
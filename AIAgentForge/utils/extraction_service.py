@@ -0,0 +1,92 @@
+# AIAgentForge/utils/extraction_service.py
+import os
+import asyncio
+import logging
+import multiprocessing
+
+from .text_extractor import FileSource, iter_text_from_file
+from .chunker import chunk_text_stream
+
+logger = logging.getLogger(__name__)
+
+# PyPDF2/python-docx 추출은 CPU를 점유하므로 이벤트 루프가 아닌 별도 프로세스에서 실행합니다.
+# 워커 수는 CPU 코어 하나를 이벤트 루프용으로 남겨 두는 것을 기본값으로 합니다.
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "120"))
+# 한 문서에서 추출할 최대 단위 수. PDF는 페이지, DOCX는 DOCX_BLOCK_CHARS 블록, 텍스트는 TEXT_READ_BYTES 블록이며 넘는 부분은 버립니다.
+EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "1000"))
+
+# 동시에 실행할 추출 프로세스 수를 제한합니다.
+_slots: asyncio.Semaphore | None = None
+
+class ExtractionTimeoutError(Exception):
+    """파일 한 건의 텍스트 추출이 제한 시간을 넘긴 경우 발생합니다."""
+
+def _get_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(EXTRACTION_WORKERS)
+    return _slots
+
+def extract_chunks(source: FileSource, mime_type: str, max_pages: int | None = None) -> list[dict]:
+    """워커 프로세스에서 페이지 단위로 텍스트를 읽으며 바로 청크로 분할합니다.
+    문서 전체 텍스트를 한 번에 메모리에 올리지 않습니다."""
+    return list(chunk_text_stream(iter_text_from_file(source, mime_type, max_pages)))
+
+def _process_main(conn, func, args):
+    """자식 프로세스에서 func를 실행하고 결과나 예외를 파이프로 돌려보냅니다."""
+    try:
+        result = ("ok", func(*args))
+    except Exception as e:
+        result = ("error", e)
+    try:
+        conn.send(result)
+    except Exception as e:
+        # 결과나 예외를 pickle할 수 없는 경우
+        conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+    finally:
+        conn.close()
+
+async def _run_in_process(func, *args, timeout: float):
+    """작업 한 건을 전용 프로세스에서 실행하고, 이벤트 루프를 막지 않고 결과를 기다립니다.
+
+    작업마다 프로세스를 따로 띄우므로 시간이 초과되면 그 작업의 프로세스만 종료되고
+    다른 사용자의 추출에는 영향이 없습니다.
+    """
+    loop = asyncio.get_running_loop()
+    async with _get_slots():
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_process_main, args=(sender, func, args), daemon=True)
+        process.start()
+        sender.close()
+        received = loop.run_in_executor(None, receiver.recv)
+        try:
+            done, _ = await asyncio.wait({received}, timeout=timeout)
+            if not done:
+                logger.warning(f"Text extraction timed out after {timeout}s; terminating pid {process.pid}.")
+                raise ExtractionTimeoutError(f"텍스트 추출이 {timeout:.0f}초 안에 끝나지 않았습니다.")
+            try:
+                status, value = received.result()
+            except EOFError:
+                raise RuntimeError(f"텍스트 추출 프로세스가 비정상 종료되었습니다. (exit code {process.exitcode})")
+        finally:
+            if process.is_alive():
+                process.terminate()
+            await loop.run_in_executor(None, process.join)
+            # 프로세스가 끝나면 recv도 EOF로 끝나므로, 스레드가 파이프를 다 쓴 뒤에 닫습니다.
+            await asyncio.wait({received})
+            if not received.cancelled():
+                received.exception()
+            receiver.close()
+    if status == "error":
+        raise value
+    return value
+
+async def extract_chunks_async(
+    source: FileSource,
+    mime_type: str,
+    timeout: float = EXTRACTION_TIMEOUT_SECONDS,
+    max_pages: int = EXTRACTION_MAX_PAGES,
+) -> list[dict]:
+    """별도 프로세스에서 스트리밍 추출과 청킹을 수행하고 페이지 번호가 포함된 청크 목록을 반환합니다."""
+    return await _run_in_process(extract_chunks, source, mime_type, max_pages, timeout=timeout)
@@ -0,0 +1,315 @@
+# AIAgentForge/utils/hybrid_search.py
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterator
+from .embedder import get_embedding_model
+from .query_embedding_cache import embed_queries, embed_query
+from .local_vector_index import local_index, local_semantic_search
+from .search_result_cache import fetch_collection_version, search_result_cache
+from .supabase_clients import client_factory
+from .vector_settings import (
+    EMBEDDING_STORAGE,
+    HNSW_EF_SEARCH,
+    HYBRID_SEARCH_FUNCTION,
+    KEYWORD_SEARCH_FUNCTION,
+    SEMANTIC_SEARCH_FUNCTION,
+    candidate_count,
+    get_collection_dimensions_async,
+    search_tuning_params,
+)
+
+# hybrid_search_multilingual의 rrf_k 기본값과 같아야 합니다.
+RRF_K = 60
+
+def rrf_fuse(semantic_rows: list[dict], keyword_rows: list[dict], match_count: int, rrf_k: int = RRF_K) -> list[dict]:
+    """두 검색의 순위(rank)를 SQL 함수와 같은 RRF 식(1 / (rrf_k + rank)의 합)으로 결합해 상위 match_count개를 반환합니다.
+
+    반환 형식은 hybrid_search_multilingual 결과와 같습니다.
+    """
+    scores: dict[str, float] = {}
+    rows: dict[str, dict] = {}
+    for hits in (semantic_rows, keyword_rows):
+        for row in hits:
+            scores[row["id"]] = scores.get(row["id"], 0.0) + 1.0 / (rrf_k + row["rank"])
+            rows.setdefault(row["id"], row)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:match_count]
+    return [
+        {
+            "id": section_id,
+            "content": rows[section_id]["content"],
+            "document_id": rows[section_id]["document_id"],
+            "collection_id": rows[section_id]["collection_id"],
+            "owner_id": rows[section_id]["owner_id"],
+            "rrf_score": score,
+        }
+        for section_id, score in ranked
+    ]
+
+async def keyword_search(access_token: str, collection_id: str, owner_id: str, query: str, count: int) -> list[dict]:
+    """PGroonga 키워드 검색 부분만 실행합니다. 각 행에 rank가 들어 있습니다."""
+    response = await client_factory.async_postgrest(access_token).rpc(
+        KEYWORD_SEARCH_FUNCTION,
+        {"query_text": query, "p_owner_id": owner_id, "p_collection_id": collection_id, "match_count": count},
+    ).execute()
+    return response.data or []
+
+async def _local_semantic_search(
+    access_token: str, collection_id: str, owner_id: str, query_embedding: list[float], count: int, model: str,
+    collection_version: int | None,
+) -> list[dict] | None:
+    # 로컬 인덱스 적재는 스레드에서 여러 페이지를 읽으므로 동기 클라이언트를 사용합니다.
+    return await local_semantic_search(
+        client_factory.postgrest(access_token), collection_id, owner_id, query_embedding, count, model, collection_version,
+    )
+
+async def semantic_search(
+    access_token: str, collection_id: str, owner_id: str, query_embedding: list[float], count: int, model: str,
+    collection_version: int | None = None,
+) -> list[dict]:
+    """의미 검색 부분만 실행합니다. 로컬 인덱스가 있으면 메모리에서, 없으면 RPC로 검색합니다."""
+    rows = await _local_semantic_search(
+        access_token, collection_id, owner_id, query_embedding, count, model, collection_version,
+    )
+    if rows is not None:
+        return rows
+    response = await client_factory.async_postgrest(access_token).rpc(
+        SEMANTIC_SEARCH_FUNCTION,
+        {
+            "query_embedding": query_embedding,
+            "p_owner_id": owner_id,
+            "p_collection_id": collection_id,
+            "match_count": count,
+            "p_embedding_model": model,
+            "p_ef_search": HNSW_EF_SEARCH,
+        },
+    ).execute()
+    return response.data or []
+
+async def _collection_version(access_token: str, collection_id: str) -> int | None:
+    """결과 캐시나 로컬 인덱스를 쓸 때만 데이터베이스의 컬렉션 버전을 읽습니다. 둘 다 쓰지 않으면 None입니다."""
+    if search_result_cache is None and local_index is None:
+        return None
+    return await fetch_collection_version(client_factory.async_postgrest(access_token), collection_id)
+
+def _cache_key(
+    owner_id: str, collection_id: str, query: str, match_count: int, model: str, version: int | None,
+) -> tuple | None:
+    """결과 캐시 키. 캐시를 쓰지 않거나 버전을 모르면 None입니다."""
+    if search_result_cache is None or version is None:
+        return None
+    return search_result_cache.make_key(
+        owner_id, collection_id, version, query, match_count, model, EMBEDDING_STORAGE, *search_tuning_params().values(),
+    )
+
+async def search_sections(
+    access_token: str,
+    collection_id: str,
+    owner_id: str,
+    query: str,
+    match_count: int,
+    query_embedding: list[float] | None = None,
+    collection_version: int | None = None,
+) -> list[dict]:
+    """컬렉션에서 질의와 관련된 청크를 하이브리드 검색으로 찾습니다. (Reflex 상태와 API 라우터가 함께 사용)
+
+    1. 같은 검색의 결과가 캐시에 있으면 임베딩 없이 바로 반환합니다. 키에 데이터베이스의 컬렉션 버전이 들어가므로
+       다른 워커에서 문서가 바뀐 경우에도 이전 결과는 쓰이지 않습니다.
+    2. 질의 임베딩을 컬렉션 차원으로 만들고, 로컬 인덱스가 있으면 의미 검색은 메모리에서, 키워드 검색은 DB에서
+       실행해 결합합니다. 로컬 인덱스도 같은 버전으로 확인해 다른 워커에서 바뀐 문서를 먼저 다시 읽습니다.
+       없으면 하이브리드 검색 RPC 한 번으로 처리합니다.
+    access_token은 사용자 토큰입니다. document_sections의 RLS를 통과해야 하므로 모든 RPC를 이 토큰으로 인증된 클라이언트로 호출합니다.
+    query_embedding을 주면(배치 검색에서 미리 한 번에 임베딩한 경우) 임베딩을 다시 만들지 않고,
+    collection_version을 주면 버전을 다시 읽지 않습니다.
+    """
+    model = get_embedding_model()
+    if collection_version is None:
+        collection_version = await _collection_version(access_token, collection_id)
+    key = _cache_key(owner_id, collection_id, query, match_count, model, collection_version)
+    if key is not None:
+        cached = search_result_cache.get(key)
+        if cached is not None:
+            return cached
+
+    if query_embedding is None:
+        dimensions = await get_collection_dimensions_async(client_factory.async_postgrest(access_token), collection_id)
+        query_embedding = await embed_query(query, dimensions)
+
+    count = candidate_count(match_count)
+    semantic_rows = await _local_semantic_search(
+        access_token, collection_id, owner_id, query_embedding, count, model, collection_version,
+    )
+    if semantic_rows is not None:
+        keyword_rows = await keyword_search(access_token, collection_id, owner_id, query, count)
+        results = rrf_fuse(semantic_rows, keyword_rows, match_count)
+    else:
+        # hybrid_search_multilingual RPC 실행 (EMBEDDING_STORAGE에 따라 halfvec 버전)
+        response = await client_factory.async_postgrest(access_token).rpc(
+            HYBRID_SEARCH_FUNCTION,
+            params={
+                "query_text": query,
+                "query_embedding": query_embedding,
+                "p_collection_id": collection_id,
+                "p_owner_id": owner_id,
+                "match_count": match_count,
+                "p_embedding_model": model,
+                **search_tuning_params(),
+            },
+        ).execute()
+        results = response.data or []
+
+    if key is not None:
+        search_result_cache.put(key, results)
+    return results
+
+@dataclass
+class BatchSearchItem:
+    """배치 검색의 질의 하나입니다."""
+    collection_id: str
+    query: str
+    match_count: int
+
+async def search_sections_batch(
+    access_token: str,
+    owner_id: str,
+    items: list[BatchSearchItem],
+    concurrency: int,
+) -> AsyncIterator[tuple[int, list[dict] | Exception]]:
+    """여러 질의를 한 번에 검색하고 (입력 순서 번호, 결과 또는 예외)를 끝나는 순서대로 내보냅니다.
+
+    결과 캐시에 있는 질의는 바로 내보내고, 나머지는 컬렉션 차원별로 모아 한 번의 배치로 임베딩한 뒤
+    search_sections로 최대 concurrency개씩 동시에 검색합니다. 한 질의의 실패는 다른 질의에 영향을 주지 않습니다.
+    """
+    model = get_embedding_model()
+    db_client = client_factory.async_postgrest(access_token)
+    # 컬렉션 버전은 컬렉션마다 한 번만 읽습니다. 읽지 못한 컬렉션은 캐시 없이 검색하며 오류는 검색에서 드러납니다.
+    versions: dict[str, int | None] = {}
+    if search_result_cache is not None or local_index is not None:
+        for collection_id in dict.fromkeys(item.collection_id for item in items):
+            try:
+                versions[collection_id] = await fetch_collection_version(db_client, collection_id)
+            except Exception:
+                versions[collection_id] = None
+    pending: list[int] = []
+    for index, item in enumerate(items):
+        key = _cache_key(owner_id, item.collection_id, item.query, item.match_count, model, versions.get(item.collection_id))
+        cached = search_result_cache.get(key) if key is not None else None
+        if cached is not None:
+            yield index, cached
+        else:
+            pending.append(index)
+    if not pending:
+        return
+
+    # 컬렉션마다 차원이 다를 수 있으므로 차원별로 한 번씩 임베딩합니다.
+    embeddings: dict[int, list[float] | Exception] = {}
+    by_dimensions: dict[int, list[int]] = {}
+    for collection_id in dict.fromkeys(items[index].collection_id for index in pending):
+        try:
+            dimensions = await get_collection_dimensions_async(db_client, collection_id)
+        except Exception as e:
+            for index in pending:
+                if items[index].collection_id == collection_id:
+                    embeddings[index] = e
+            continue
+        for index in pending:
+            if items[index].collection_id == collection_id:
+                by_dimensions.setdefault(dimensions, []).append(index)
+    for dimensions, indices in by_dimensions.items():
+        try:
+            vectors = await embed_queries([items[index].query for index in indices], dimensions)
+            embeddings.update(zip(indices, vectors))
+        except Exception as e:
+            embeddings.update((index, e) for index in indices)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int) -> tuple[int, list[dict] | Exception]:
+        embedding = embeddings[index]
+        if isinstance(embedding, Exception):
+            return index, embedding
+        item = items[index]
+        try:
+            async with semaphore:
+                return index, await search_sections(
+                    access_token, item.collection_id, owner_id, item.query, item.match_count, embedding,
+                    versions.get(item.collection_id),
+                )
+        except Exception as e:
+            return index, e
+
+    tasks = [asyncio.create_task(run(index)) for index in pending]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def search_sections_phased(
+    access_token: str,
+    collection_id: str,
+    owner_id: str,
+    query: str,
+    match_count: int,
+) -> AsyncIterator[tuple[str, dict]]:
+    """하이브리드 검색을 단계별로 실행하며 (단계 이름, 결과) 를 차례로 내보냅니다.
+
+    키워드 검색은 질의 임베딩과 동시에 시작하므로 가장 먼저 "keyword_hits"로 나오고,
+    이어서 "semantic_hits", 마지막으로 두 순위를 RRF로 결합한 "fused"가 나옵니다.
+    각 결과에는 단계 소요 시간(phase_ms)과 요청 시작부터의 경과 시간(elapsed_ms)이 들어 있습니다.
+    같은 검색의 결과가 캐시에 있으면 "fused"만 바로 내보냅니다.
+    """
+    started = time.perf_counter()
+
+    def elapsed_ms() -> int:
+        return int((time.perf_counter() - started) * 1000)
+
+    model = get_embedding_model()
+    version = await _collection_version(access_token, collection_id)
+    key = _cache_key(owner_id, collection_id, query, match_count, model, version)
+    if key is not None:
+        cached = search_result_cache.get(key)
+        if cached is not None:
+            yield "fused", {"results": cached, "cached": True, "phase_ms": elapsed_ms(), "elapsed_ms": elapsed_ms()}
+            return
+
+    count = candidate_count(match_count)
+
+    async def embed_and_search() -> tuple[list[dict], int, int]:
+        dimensions = await get_collection_dimensions_async(client_factory.async_postgrest(access_token), collection_id)
+        query_embedding = await embed_query(query, dimensions)
+        embedded_at = time.perf_counter()
+        rows = await semantic_search(access_token, collection_id, owner_id, query_embedding, count, model, version)
+        return rows, int((embedded_at - started) * 1000), int((time.perf_counter() - embedded_at) * 1000)
+
+    keyword_task = asyncio.create_task(keyword_search(access_token, collection_id, owner_id, query, count))
+    semantic_task = asyncio.create_task(embed_and_search())
+    try:
+        keyword_rows = await keyword_task
+        keyword_ms = elapsed_ms()
+        yield "keyword_hits", {"results": keyword_rows, "phase_ms": keyword_ms, "elapsed_ms": keyword_ms}
+
+        semantic_rows, embedding_ms, search_ms = await semantic_task
+        yield "semantic_hits", {
+            "results": semantic_rows,
+            "phase_ms": embedding_ms + search_ms,
+            "embedding_ms": embedding_ms,
+            "search_ms": search_ms,
+            "elapsed_ms": elapsed_ms(),
+        }
+    finally:
+        # 클라이언트가 연결을 끊어 중단되면 남은 작업도 취소합니다.
+        for task in (keyword_task, semantic_task):
+            task.cancel()
+
+    fuse_started = time.perf_counter()
+    results = rrf_fuse(semantic_rows, keyword_rows, match_count)
+    if key is not None:
+        search_result_cache.put(key, results)
+    yield "fused", {
+        "results": results,
+        "cached": False,
+        "phase_ms": int((time.perf_counter() - fuse_started) * 1000),
+        "elapsed_ms": elapsed_ms(),
+    }
@@ -0,0 +1,72 @@
+# AIAgentForge/utils/ingestion_jobs.py
+import uuid
+from dataclasses import dataclass, field
+
+# documents.status 값. 각 단계가 끝날 때마다 DB에 기록되어 어느 문서가 어디서 멈췄는지 알 수 있습니다.
+# 재개는 상태와 관계없이 추출부터 다시 실행하며, 이미 저장된 section만 내용 해시로 건너뜁니다.
+# 추출과 청킹은 같은 워커 호출에서 끝나므로 uploaded 다음은 바로 chunked 입니다.
+STATUS_UPLOADED = "uploaded"
+STATUS_CHUNKED = "chunked"
+STATUS_EMBEDDED = "embedded"
+STATUS_INDEXED = "indexed"
+STATUS_FAILED = "failed"
+
+@dataclass
+class IngestionJob:
+    """백그라운드에서 처리할 문서 한 건의 수집 작업 정보입니다."""
+    filename: str
+    spool_path: str | None  # 업로드 내용을 담은 임시 파일. 재개 작업은 스토리지에서 다시 받아 채웁니다.
+    content_type: str | None
+    collection_id: str
+    user_id: str
+    access_token: str
+
+    # 파이프라인 단계를 거치며 채워지는 값들. 재개 작업은 document_id와 storage_path가 미리 채워져 있습니다.
+    storage_path: str | None = None
+    document_id: str | None = None
+    content_hash: str | None = None
+    size: int = 0
+    chunk_count: int = 0
+    chunks: list[dict] = field(default_factory=list)
+    embeddings: list[list[float]] = field(default_factory=list)
+    completed: bool = False
+    # 이 작업이 처리 중으로 표시한 document_id. 작업이 끝나면 표시를 해제합니다.
+    claimed_document_id: str | None = None
+
+    # 기존 문서를 새 버전으로 갱신하는 작업에서만 사용합니다.
+    is_update: bool = False
+    replaced_storage_path: str | None = None
+    section_ids: list[str] | None = None
+    stale_section_ids: list[str] = field(default_factory=list)
+
+# 업로드 핸들러가 등록한 작업을 백그라운드 이벤트가 꺼내 갈 때까지 보관합니다.
+# 작업 정보에는 접근 토큰 등이 담겨 있으므로 이벤트 인자로 직렬화하지 않고 job_id만 전달합니다.
+_pending_jobs: dict[str, IngestionJob] = {}
+
+def submit_ingestion_job(job: IngestionJob) -> str:
+    """작업을 대기열에 등록하고 job_id를 반환합니다."""
+    job_id = uuid.uuid4().hex
+    _pending_jobs[job_id] = job
+    return job_id
+
+def pop_ingestion_job(job_id: str) -> IngestionJob | None:
+    """job_id에 해당하는 작업을 대기열에서 꺼냅니다. 없으면 None을 반환합니다."""
+    return _pending_jobs.pop(job_id, None)
+
+# 이 프로세스에서 파이프라인이 처리 중인 document_id.
+# 같은 문서를 두 파이프라인이 동시에 처리하면 section 저장/삭제와 상태 기록이 서로 엇갈리므로 하나만 허용합니다.
+_active_documents: set[str] = set()
+
+def claim_document(job: IngestionJob, document_id: str) -> bool:
+    """작업이 처리할 문서를 처리 중으로 표시합니다. 다른 작업이 이미 처리 중이면 False를 반환합니다."""
+    if document_id in _active_documents:
+        return False
+    _active_documents.add(document_id)
+    job.claimed_document_id = document_id
+    return True
+
+def release_document(job: IngestionJob):
+    """claim_document로 표시한 문서를 해제합니다."""
+    if job.claimed_document_id is not None:
+        _active_documents.discard(job.claimed_document_id)
+        job.claimed_document_id = None
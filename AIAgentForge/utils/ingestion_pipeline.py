@@ -0,0 +1,115 @@
+# AIAgentForge/utils/ingestion_pipeline.py
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# 단계 사이 대기열 크기. 앞 단계가 너무 앞서 나가 메모리를 쌓지 않도록 작게 유지합니다.
+DEFAULT_QUEUE_SIZE = 2
+
+_DONE = object()
+
+@dataclass
+class Stage:
+    """파이프라인의 한 단계. handler가 None을 반환하면 해당 항목은 다음 단계로 넘어가지 않습니다."""
+    name: str
+    handler: Callable[[Any], Awaitable[Any]]
+    concurrency: int = 1
+
+class StageStats:
+    """단계별 누적 처리량 카운터입니다."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    def snapshot(self) -> dict:
+        handled = self.processed + self.failed
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "avg_seconds_per_item": round(self.busy_seconds / handled, 3) if handled else 0.0,
+        }
+
+# 워커 프로세스 전체에서 공유되는 단계별 누적 통계
+stage_stats: dict[str, StageStats] = {}
+
+def get_stage_stats() -> dict[str, dict]:
+    """모든 단계의 누적 처리량 통계를 반환합니다."""
+    return {name: stats.snapshot() for name, stats in stage_stats.items()}
+
+async def _run_stage(
+    stage: Stage,
+    inbox: asyncio.Queue,
+    outbox: asyncio.Queue | None,
+    downstream_workers: int,
+    on_error: Callable[[Any, Exception], Awaitable[None]],
+):
+    stats = stage_stats.setdefault(stage.name, StageStats(stage.name))
+
+    async def worker():
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            started = time.perf_counter()
+            try:
+                result = await stage.handler(item)
+            except Exception as e:
+                stats.failed += 1
+                logger.exception(f"Pipeline stage '{stage.name}' failed")
+                try:
+                    await on_error(item, e)
+                except Exception:
+                    # 실패 처리 자체가 실패해도 워커는 남은 항목을 계속 처리해야 대기열이 비워집니다.
+                    logger.exception(f"Pipeline error handler failed in stage '{stage.name}'")
+                continue
+            finally:
+                stats.busy_seconds += time.perf_counter() - started
+            stats.processed += 1
+            if result is not None and outbox is not None:
+                await outbox.put(result)
+
+    await asyncio.gather(*(worker() for _ in range(stage.concurrency)))
+    # 이 단계의 워커가 모두 끝나면 다음 단계 워커들에게 종료를 알립니다.
+    if outbox is not None:
+        for _ in range(downstream_workers):
+            await outbox.put(_DONE)
+
+async def run_pipeline(
+    items: Iterable[Any],
+    stages: list[Stage],
+    on_error: Callable[[Any, Exception], Awaitable[None]],
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+):
+    """항목들을 여러 단계에 흘려보내며 단계들을 동시에 실행합니다.
+
+    단계 사이에는 크기가 제한된 대기열을 두어, 예를 들어 N+1번째 파일을 추출하는 동안
+    N번째 파일의 임베딩과 N-1번째 파일의 DB 저장이 함께 진행되도록 합니다.
+    한 항목의 실패는 on_error로 전달되고 나머지 항목의 처리는 계속됩니다. (on_error가 실패해도 마찬가지)
+    """
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+
+    async def feed():
+        for item in items:
+            await queues[0].put(item)
+        for _ in range(stages[0].concurrency):
+            await queues[0].put(_DONE)
+
+    runners = [
+        _run_stage(
+            stage,
+            queues[i],
+            queues[i + 1] if i + 1 < len(stages) else None,
+            stages[i + 1].concurrency if i + 1 < len(stages) else 0,
+            on_error,
+        )
+        for i, stage in enumerate(stages)
+    ]
+    await asyncio.gather(feed(), *runners)
@@ -0,0 +1,407 @@
+# AIAgentForge/utils/local_vector_index.py
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import numpy as np
+from postgrest import SyncPostgrestClient
+from postgrest.types import CountMethod
+from .vector_settings import EMBEDDING_STORAGE
+
+logger = logging.getLogger(__name__)
+
+# 자주 검색되는 작은 컬렉션의 임베딩을 프로세스 메모리에 올려 의미 검색을 RPC 없이 처리합니다.
+# 키워드 검색은 DB(PGroonga)에서 하고 결과는 hybrid_search에서 SQL 함수와 같은 RRF 식으로 결합합니다.
+# - "off": 사용하지 않습니다. 모든 검색은 하이브리드 검색 RPC를 사용합니다.
+# - "float32" / "float16": 해당 정밀도의 행렬로 보관합니다. float16은 메모리가 절반이고 계산 시 float32로 변환합니다.
+LOCAL_VECTOR_INDEX = os.getenv("LOCAL_VECTOR_INDEX", "off")
+if LOCAL_VECTOR_INDEX not in ("off", "float32", "float16"):
+    raise ValueError(f"LOCAL_VECTOR_INDEX must be 'off', 'float32' or 'float16', got {LOCAL_VECTOR_INDEX!r}")
+
+# 이보다 청크가 많은 컬렉션은 메모리에 올리지 않고 RPC로 검색합니다.
+LOCAL_INDEX_MAX_ROWS = int(os.getenv("LOCAL_INDEX_MAX_ROWS", "200000"))
+# 동시에 메모리에 둘 컬렉션 수. 넘으면 가장 오래 검색되지 않은 컬렉션을 내립니다.
+LOCAL_INDEX_MAX_COLLECTIONS = int(os.getenv("LOCAL_INDEX_MAX_COLLECTIONS", "16"))
+# 이보다 청크가 많으면 전체 비교 대신 IVF(클러스터 중심 근처 목록만 비교)로 검색합니다.
+LOCAL_INDEX_IVF_THRESHOLD = int(os.getenv("LOCAL_INDEX_IVF_THRESHOLD", "20000"))
+LOCAL_INDEX_IVF_NPROBE = int(os.getenv("LOCAL_INDEX_IVF_NPROBE", "12"))
+# 다른 워커의 변경은 collections.version으로 알아채 바뀐 문서만 다시 읽습니다. 그와 별개로 이 시간이 지나면 전체를 다시 읽습니다.
+LOCAL_INDEX_TTL_SECONDS = float(os.getenv("LOCAL_INDEX_TTL_SECONDS", "600"))
+
+PAGE_SIZE = 1000
+# float16 행렬은 이 행 수만큼씩 float32로 바꿔 곱합니다. (numpy의 float16 행렬 곱은 BLAS를 쓰지 않아 느립니다)
+SCORE_BLOCK_ROWS = 16384
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+
+def _sql_rank(ordered_ids: list[str], scores: np.ndarray) -> dict[str, int]:
+    """점수 내림차순 목록에 SQL rank()와 같은 순위(동점은 같은 순위, 다음 순위는 건너뜀)를 매깁니다."""
+    ranks: dict[str, int] = {}
+    previous = None
+    rank = 0
+    for position, (section_id, score) in enumerate(zip(ordered_ids, scores), start=1):
+        if score != previous:
+            rank = position
+            previous = score
+        ranks[section_id] = rank
+    return ranks
+
+def _parse_vector(value, dimensions: int) -> np.ndarray | None:
+    """PostgREST가 텍스트('[0.1,...]')로 돌려주는 vector/halfvec 값을 정규화된 배열로 바꿉니다."""
+    vector = np.asarray(json.loads(value) if isinstance(value, str) else value, dtype=np.float32)
+    if vector.shape != (dimensions,):
+        return None
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else None
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """검색에 쓰는 불변 데이터. 변경은 새 스냅샷을 만들어 교체하므로 검색 중인 스레드와 충돌하지 않습니다."""
+    ids: list[str]
+    contents: list[str]
+    document_ids: list[str]
+    matrix: np.ndarray  # (행 수, 차원), 각 행은 정규화된 벡터
+    centroids: np.ndarray | None = None  # IVF 클러스터 중심. 행 수가 임계값 이하이면 None
+    assignments: np.ndarray | None = None  # 각 행이 속한 클러스터 번호
+    trained_rows: int = 0  # 클러스터 중심을 학습할 때의 행 수
+
+@dataclass
+class CollectionIndex:
+    """한 컬렉션(소유자, 임베딩 모델, 차원)의 임베딩 행렬입니다."""
+    collection_id: str
+    owner_id: str
+    model: str
+    dimensions: int
+    snapshot: _Snapshot
+    # 적재 또는 마지막 확인 시점의 collections.version과 문서별 (status, status_updated_at)
+    version: int | None = None
+    document_states: dict[str, tuple] = field(default_factory=dict)
+    loaded_at: float = field(default_factory=time.monotonic)
+    # 수집/삭제로 바뀌어 다음 검색 전에 다시 읽어야 하는 문서들
+    stale_documents: set[str] = field(default_factory=set)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @property
+    def size(self) -> int:
+        return len(self.snapshot.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.snapshot.matrix.nbytes
+
+def _dtype():
+    return np.float16 if LOCAL_VECTOR_INDEX == "float16" else np.float32
+
+def _scores(matrix: np.ndarray, query: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+    """질의 벡터와 각 행의 코사인 유사도. rows를 주면 해당 행만 계산합니다."""
+    if rows is not None:
+        matrix = matrix[rows]
+    if matrix.dtype == np.float32:
+        return matrix @ query
+    return np.concatenate([
+        matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32) @ query
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS)
+    ]) if len(matrix) else np.empty(0, dtype=np.float32)
+
+def _assign(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """각 행을 가장 가까운 클러스터 중심에 배정합니다."""
+    assignments = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+        block = matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+def _train_ivf(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """구면 k-means로 sqrt(행 수)개의 클러스터 중심을 학습하고 모든 행을 배정합니다."""
+    list_count = max(1, int(np.sqrt(len(matrix))))
+    rng = np.random.default_rng(0)
+    sample_size = min(len(matrix), list_count * KMEANS_SAMPLE_PER_LIST)
+    sample = matrix[rng.choice(len(matrix), sample_size, replace=False)].astype(np.float32)
+    centroids = sample[rng.choice(sample_size, list_count, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        # 빈 클러스터는 이전 중심을 유지합니다.
+        centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+    return centroids, _assign(matrix, centroids)
+
+def _build_snapshot(
+    ids: list[str], contents: list[str], document_ids: list[str], matrix: np.ndarray, previous: _Snapshot | None = None,
+) -> _Snapshot:
+    """행렬로 스냅샷을 만듭니다. 임계값을 넘으면 IVF를 붙이고, 학습 이후 행 수가 두 배가 되기 전까지는 중심을 재사용합니다."""
+    if len(ids) <= LOCAL_INDEX_IVF_THRESHOLD:
+        return _Snapshot(ids, contents, document_ids, matrix)
+    if previous is not None and previous.centroids is not None and len(ids) < previous.trained_rows * 2:
+        return _Snapshot(ids, contents, document_ids, matrix, previous.centroids, _assign(matrix, previous.centroids), previous.trained_rows)
+    centroids, assignments = _train_ivf(matrix)
+    return _Snapshot(ids, contents, document_ids, matrix, centroids, assignments, len(ids))
+
+def _search_snapshot(snapshot: _Snapshot, query: np.ndarray, candidate_count: int) -> tuple[np.ndarray, np.ndarray]:
+    """유사도 상위 candidate_count개의 행 위치와 점수를 내림차순으로 반환합니다."""
+    rows = None
+    if snapshot.centroids is not None:
+        nprobe = min(LOCAL_INDEX_IVF_NPROBE, len(snapshot.centroids))
+        probe = np.argpartition(-(snapshot.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.flatnonzero(np.isin(snapshot.assignments, probe))
+        # 가까운 목록에 후보가 모자라면 전체를 비교합니다.
+        if len(rows) < candidate_count:
+            rows = None
+    scores = _scores(snapshot.matrix, query, rows)
+    count = min(candidate_count, len(scores))
+    if count == 0:
+        return np.empty(0, dtype=np.int64), scores[:0]
+    top = np.argpartition(-scores, count - 1)[:count]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return (top if rows is None else rows[top]), scores[top]
+
+def _embedding_column() -> str:
+    return "embedding_half" if EMBEDDING_STORAGE == "halfvec" else "embedding"
+
+def _sections_query(
+    db_client: SyncPostgrestClient, collection_id: str, owner_id: str, model: str, dimensions: int, columns: str, **select_options,
+):
+    """검색 함수와 같은 조건(소유자, 컬렉션, 모델, 차원, 임베딩 있음)으로 청크를 고르는 쿼리를 만듭니다."""
+    column = _embedding_column()
+    query = db_client.from_("document_sections").select(columns, **select_options) \
+        .eq("collection_id", collection_id).eq("owner_id", owner_id).eq("embedding_model", model) \
+        .not_.is_(column, "null")
+    if EMBEDDING_STORAGE == "halfvec":
+        query = query.eq("embedding_dims", dimensions)
+    return query
+
+def _fetch_rows(
+    db_client: SyncPostgrestClient, collection_id: str, owner_id: str, model: str, dimensions: int,
+    document_ids: list[str] | None = None,
+) -> tuple[list[str], list[str], list[str], np.ndarray]:
+    """조건에 맞는 청크를 id 순서로 나눠 읽어 행렬로 만듭니다. OFFSET 대신 마지막 id 다음부터 읽습니다."""
+    column = _embedding_column()
+    ids, contents, doc_ids, vectors = [], [], [], []
+    last_id = None
+    while True:
+        query = _sections_query(db_client, collection_id, owner_id, model, dimensions, f"id, content, document_id, {column}")
+        if document_ids is not None:
+            query = query.in_("document_id", document_ids)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(PAGE_SIZE).execute().data
+        for row in rows:
+            vector = _parse_vector(row[column], dimensions)
+            if vector is None:
+                continue
+            ids.append(row["id"])
+            contents.append(row["content"])
+            doc_ids.append(row["document_id"])
+            vectors.append(vector)
+        if len(rows) < PAGE_SIZE:
+            break
+        last_id = rows[-1]["id"]
+    matrix = np.asarray(vectors, dtype=_dtype()).reshape(len(vectors), dimensions)
+    return ids, contents, doc_ids, np.ascontiguousarray(matrix)
+
+def _count_rows(db_client: SyncPostgrestClient, collection_id: str, owner_id: str, model: str, dimensions: int) -> int:
+    response = _sections_query(
+        db_client, collection_id, owner_id, model, dimensions, "id", count=CountMethod.exact, head=True,
+    ).execute()
+    return response.count or 0
+
+def _fetch_document_states(db_client: SyncPostgrestClient, collection_id: str, owner_id: str) -> dict[str, tuple]:
+    """컬렉션 문서별 (status, status_updated_at)을 읽습니다. 수집 단계마다 바뀌므로 이 값이 달라진 문서는 청크가 바뀐 것입니다."""
+    states: dict[str, tuple] = {}
+    last_id = None
+    while True:
+        query = db_client.from_("documents").select("id, status, status_updated_at") \
+            .eq("collection_id", collection_id).eq("owner_id", owner_id)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(PAGE_SIZE).execute().data
+        for row in rows:
+            states[row["id"]] = (row["status"], row["status_updated_at"])
+        if len(rows) < PAGE_SIZE:
+            return states
+        last_id = rows[-1]["id"]
+
+def _changed_documents(old: dict[str, tuple], new: dict[str, tuple]) -> set[str]:
+    """추가, 변경, 삭제된 문서 id를 반환합니다."""
+    return {doc_id for doc_id, state in new.items() if old.get(doc_id) != state} | (old.keys() - new.keys())
+
+def _load(
+    db_client: SyncPostgrestClient, collection_id: str, owner_id: str, model: str, dimensions: int,
+) -> tuple[_Snapshot, dict[str, tuple]] | None:
+    if _count_rows(db_client, collection_id, owner_id, model, dimensions) > LOCAL_INDEX_MAX_ROWS:
+        return None
+    # 문서 상태를 청크보다 먼저 읽어야, 그 사이에 바뀐 문서가 다음 버전 확인에서 다시 읽힙니다.
+    states = _fetch_document_states(db_client, collection_id, owner_id)
+    ids, contents, doc_ids, matrix = _fetch_rows(db_client, collection_id, owner_id, model, dimensions)
+    return _build_snapshot(ids, contents, doc_ids, matrix), states
+
+def _refresh(db_client: SyncPostgrestClient, index: CollectionIndex, document_ids: set[str]) -> _Snapshot:
+    """바뀐 문서의 행만 빼고 다시 읽어 붙입니다. 삭제된 문서는 다시 읽을 행이 없으므로 빠지기만 합니다."""
+    old = index.snapshot
+    keep = [position for position, doc_id in enumerate(old.document_ids) if doc_id not in document_ids]
+    ids, contents, doc_ids, matrix = _fetch_rows(
+        db_client, index.collection_id, index.owner_id, index.model, index.dimensions, sorted(document_ids),
+    )
+    return _build_snapshot(
+        [old.ids[p] for p in keep] + ids,
+        [old.contents[p] for p in keep] + contents,
+        [old.document_ids[p] for p in keep] + doc_ids,
+        np.ascontiguousarray(np.concatenate([old.matrix[keep], matrix])),
+        old,
+    )
+
+class LocalIndexRegistry:
+    """컬렉션별 인덱스를 LRU로 보관하고 수집/삭제 시 무효화합니다."""
+
+    def __init__(self):
+        self._indexes: OrderedDict[tuple, CollectionIndex] = OrderedDict()
+        # 행 수 제한을 넘어 RPC로 검색하는 컬렉션. TTL이 지나면 다시 확인합니다.
+        self._oversized: dict[tuple, float] = {}
+        # 같은 컬렉션을 동시에 두 번 읽지 않도록 키별로 잠급니다. 다른 컬렉션의 로드는 기다리지 않습니다.
+        self._load_locks: dict[tuple, asyncio.Lock] = {}
+        self.searches = 0
+        self.loads = 0
+        self.refreshes = 0
+        self.fallbacks = 0
+
+    async def get(
+        self, db_client: SyncPostgrestClient, collection_id: str, owner_id: str, model: str, dimensions: int,
+        version: int | None = None,
+    ) -> CollectionIndex | None:
+        """최신 상태의 인덱스를 반환합니다. 컬렉션이 너무 크면 None.
+
+        version은 호출하는 쪽이 읽은 collections.version입니다. 인덱스를 만든 뒤 버전이 바뀌었으면
+        (다른 워커가 문서를 수집하거나 삭제한 경우) 문서 상태를 비교해 바뀐 문서의 행만 다시 읽습니다.
+        """
+        key = (collection_id, owner_id, model, dimensions)
+        now = time.monotonic()
+        if self._oversized.get(key, 0) > now:
+            return None
+        index = self._indexes.get(key)
+        if index is not None and now - index.loaded_at > LOCAL_INDEX_TTL_SECONDS:
+            self._indexes.pop(key, None)
+            index = None
+        if index is None:
+            async with self._load_locks.setdefault(key, asyncio.Lock()):
+                index = self._indexes.get(key)
+                if index is None:
+                    loaded = await asyncio.to_thread(_load, db_client, collection_id, owner_id, model, dimensions)
+                    self.loads += 1
+                    if loaded is None:
+                        self._oversized[key] = now + LOCAL_INDEX_TTL_SECONDS
+                        return None
+                    snapshot, states = loaded
+                    index = CollectionIndex(collection_id, owner_id, model, dimensions, snapshot, version, states)
+                    self._indexes[key] = index
+                    while len(self._indexes) > LOCAL_INDEX_MAX_COLLECTIONS:
+                        self._indexes.popitem(last=False)
+        self._indexes.move_to_end(key)
+
+        if index.stale_documents or (version is not None and version != index.version):
+            async with index.lock:
+                stale = set(index.stale_documents)
+                states = None
+                if version is not None and version != index.version:
+                    states = await asyncio.to_thread(_fetch_document_states, db_client, collection_id, owner_id)
+                    stale |= _changed_documents(index.document_states, states)
+                if stale:
+                    index.snapshot = await asyncio.to_thread(_refresh, db_client, index, stale)
+                    index.stale_documents -= stale
+                    self.refreshes += 1
+                if states is not None:
+                    index.document_states = states
+                    index.version = version
+                if index.size > LOCAL_INDEX_MAX_ROWS:
+                    self._indexes.pop(key, None)
+                    self._oversized[key] = time.monotonic() + LOCAL_INDEX_TTL_SECONDS
+                    return None
+        return index
+
+    def invalidate_documents(self, collection_id: str, document_ids: list[str]):
+        """문서가 추가, 갱신, 삭제되었음을 알립니다. 해당 문서의 행만 다음 검색 전에 다시 읽습니다."""
+        for key, index in self._indexes.items():
+            if key[0] == collection_id:
+                index.stale_documents.update(document_ids)
+        # 행 수가 바뀌었으므로 크기 제한도 다시 확인합니다.
+        for key in [key for key in self._oversized if key[0] == collection_id]:
+            del self._oversized[key]
+
+    def drop_collection(self, collection_id: str):
+        """삭제된 컬렉션의 인덱스를 내립니다."""
+        for key in [key for key in self._indexes if key[0] == collection_id]:
+            del self._indexes[key]
+        for key in [key for key in self._load_locks if key[0] == collection_id]:
+            del self._load_locks[key]
+        for key in [key for key in self._oversized if key[0] == collection_id]:
+            del self._oversized[key]
+
+    def stats(self) -> dict:
+        return {
+            "mode": LOCAL_VECTOR_INDEX,
+            "collections": len(self._indexes),
+            "rows": sum(index.size for index in self._indexes.values()),
+            "bytes": sum(index.nbytes for index in self._indexes.values()),
+            "ivf_collections": sum(1 for index in self._indexes.values() if index.snapshot.centroids is not None),
+            "searches": self.searches,
+            "loads": self.loads,
+            "refreshes": self.refreshes,
+            "fallbacks": self.fallbacks,
+        }
+
+local_index = LocalIndexRegistry() if LOCAL_VECTOR_INDEX != "off" else None
+
+async def local_semantic_search(
+    db_client: SyncPostgrestClient,
+    collection_id: str,
+    owner_id: str,
+    query_embedding: list[float],
+    candidate_count: int,
+    embedding_model: str,
+    collection_version: int | None = None,
+) -> list[dict] | None:
+    """메모리 인덱스로 의미 검색을 합니다. semantic_search_sections RPC와 같은 형식의 행 목록을 반환합니다.
+
+    로컬 인덱스를 쓰지 않거나 컬렉션이 너무 크면 None을 반환하므로 호출하는 쪽은 RPC로 검색합니다.
+    collection_version을 주면 인덱스가 그 버전보다 오래된 경우 먼저 바뀐 문서를 다시 읽습니다.
+    """
+    if local_index is None:
+        return None
+    dimensions = len(query_embedding)
+    index = await local_index.get(db_client, collection_id, owner_id, embedding_model, dimensions, collection_version)
+    if index is None:
+        local_index.fallbacks += 1
+        return None
+    local_index.searches += 1
+
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query /= max(float(np.linalg.norm(query)), 1e-12)
+    snapshot = index.snapshot
+    positions, scores = await asyncio.to_thread(_search_snapshot, snapshot, query, candidate_count)
+    ranks = _sql_rank([snapshot.ids[position] for position in positions], scores)
+    return [
+        {
+            "id": snapshot.ids[position],
+            "content": snapshot.contents[position],
+            "document_id": snapshot.document_ids[position],
+            "collection_id": collection_id,
+            "owner_id": owner_id,
+            # pgvector <=> 와 같은 코사인 거리
+            "distance": 1.0 - float(score),
+            "rank": ranks[snapshot.ids[position]],
+        }
+        for position, score in zip(positions, scores)
+    ]
+
+def invalidate_documents(collection_id: str, document_ids: list[str]):
+    """수집이나 삭제로 문서의 청크가 바뀌었을 때 호출합니다. 로컬 인덱스를 쓰지 않으면 아무것도 하지 않습니다."""
+    if local_index is not None:
+        local_index.invalidate_documents(collection_id, document_ids)
+
+def drop_collection(collection_id: str):
+    """컬렉션이 삭제되었을 때 호출합니다."""
+    if local_index is not None:
+        local_index.drop_collection(collection_id)
@@ -0,0 +1,135 @@
+# AIAgentForge/utils/query_embedding_cache.py
+import os
+import time
+import asyncio
+import unicodedata
+from collections import OrderedDict
+from .embedder import generate_embeddings, get_embedding_model, default_dimensions
+
+# 검색 질의 임베딩을 프로세스 메모리에 보관하는 LRU 캐시입니다. 0으로 설정하면 사용하지 않습니다.
+# 같은 질문이 반복되면 임베딩 API 호출과 SQLite 임베딩 캐시 조회 없이 바로 검색할 수 있습니다.
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL_SECONDS", "3600"))
+
+def normalize_query(text: str) -> str:
+    """유니코드 정규화(NFC)와 공백 정리로 같은 질문을 같은 키로 만듭니다."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+class QueryEmbeddingCache:
+    """(모델, 차원, 정규화된 질의) 키의 크기 제한 LRU + TTL 캐시입니다.
+
+    같은 키를 동시에 조회하면 첫 요청만 임베딩을 생성하고 나머지는 그 결과를 기다립니다.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple, tuple[float, list[float]]] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Task] = {}
+
+    def _lookup(self, key: tuple) -> list[float] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, vector = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return vector
+
+    def _store(self, key: tuple, vector: list[float]):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, query: str, dimensions: int) -> list[float]:
+        return (await self.get_many([query], dimensions))[0]
+
+    async def get_many(self, queries: list[str], dimensions: int) -> list[list[float]]:
+        """질의 목록의 임베딩을 입력 순서대로 반환합니다. 캐시에 없는 질의는 한 번의 요청으로 함께 임베딩합니다."""
+        model = get_embedding_model()
+        keys = [(model, dimensions, normalize_query(query)) for query in queries]
+        vectors: dict[tuple, list[float]] = {}
+        waiting: dict[tuple, asyncio.Future] = {}
+        missing: list[tuple] = []
+        for key in dict.fromkeys(keys):
+            vector = self._lookup(key)
+            if vector is not None:
+                self.hits += 1
+                vectors[key] = vector
+            elif key in self._inflight:
+                self.coalesced += 1
+                waiting[key] = self._inflight[key]
+            else:
+                self.misses += 1
+                missing.append(key)
+
+        if missing:
+            batch = asyncio.create_task(self._fill(missing, dimensions))
+            for key in missing:
+                # 같은 질의가 동시에 들어오면 이 배치의 결과를 기다리도록 질의별 작업을 등록합니다.
+                task = asyncio.create_task(self._pick(batch, key))
+                self._inflight[key] = task
+                waiting[key] = task
+
+        for key, task in waiting.items():
+            # 기다리던 요청 하나가 취소되어도 임베딩 생성은 계속되어 다른 요청과 캐시에 쓰이도록 shield로 감쌉니다.
+            vectors[key] = await asyncio.shield(task)
+        return [vectors[key] for key in keys]
+
+    async def _fill(self, keys: list[tuple], dimensions: int) -> dict[tuple, list[float]]:
+        embeddings = await generate_embeddings([key[2] for key in keys], dimensions)
+        if len(embeddings) != len(keys):
+            raise ValueError("임베딩 생성에 실패했습니다.")
+        vectors = dict(zip(keys, embeddings))
+        for key, vector in vectors.items():
+            self._store(key, vector)
+        return vectors
+
+    async def _pick(self, batch: asyncio.Task, key: tuple) -> list[float]:
+        try:
+            return (await batch)[key]
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        """적중률 등 캐시 통계를 반환합니다."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+query_embedding_cache: QueryEmbeddingCache | None = (
+    QueryEmbeddingCache(QUERY_EMBEDDING_CACHE_SIZE, QUERY_EMBEDDING_CACHE_TTL_SECONDS)
+    if QUERY_EMBEDDING_CACHE_SIZE > 0 else None
+)
+
+async def embed_query(query: str, dimensions: int | None = None) -> list[float]:
+    """검색 질의 하나의 임베딩을 반환합니다. 캐시를 쓰지 않으면 매번 generate_embeddings를 호출합니다."""
+    return (await embed_queries([query], dimensions))[0]
+
+async def embed_queries(queries: list[str], dimensions: int | None = None) -> list[list[float]]:
+    """검색 질의 여러 개의 임베딩을 입력 순서대로 반환합니다. 캐시에 없는 질의만 한 번의 배치로 임베딩합니다."""
+    dimensions = dimensions or default_dimensions()
+    if query_embedding_cache is not None:
+        return await query_embedding_cache.get_many(queries, dimensions)
+    embeddings = await generate_embeddings([normalize_query(query) for query in queries], dimensions)
+    if len(embeddings) != len(queries):
+        raise ValueError("임베딩 생성에 실패했습니다.")
+    return embeddings
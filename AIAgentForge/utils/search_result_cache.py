@@ -0,0 +1,96 @@
+# AIAgentForge/utils/search_result_cache.py
+import os
+import time
+from collections import OrderedDict
+from postgrest import AsyncPostgrestClient
+from .query_embedding_cache import normalize_query
+
+# 같은 (소유자, 컬렉션, 질의, 파라미터) 검색 결과를 프로세스 메모리에 보관합니다. 0으로 설정하면 사용하지 않습니다.
+SEARCH_RESULT_CACHE_MAX_MB = int(os.getenv("SEARCH_RESULT_CACHE_MAX_MB", "64"))
+SEARCH_RESULT_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_RESULT_CACHE_TTL_SECONDS", "300"))
+
+async def fetch_collection_version(db_client: AsyncPostgrestClient, collection_id: str) -> int:
+    """데이터베이스의 collections.version을 읽습니다. (SQL/alter_collections_version)
+
+    문서가 수집, 갱신, 삭제될 때마다 documents 트리거가 올리므로, 어느 워커가 변경을 처리했든
+    모든 워커가 같은 버전을 봅니다. 버전이 바뀌면 이전 키는 더 이상 조회되지 않고 LRU로 밀려납니다.
+    """
+    response = await db_client.from_("collections").select("version").eq("id", collection_id).maybe_single().execute()
+    row = response.data if response else None
+    return (row or {}).get("version") or 0
+
+def invalidate_collection_results(collection_id: str):
+    """이 프로세스에 저장된 컬렉션의 결과를 바로 지웁니다. (버전이 바뀌면 어차피 쓰이지 않지만 메모리를 먼저 비웁니다)"""
+    if search_result_cache is not None:
+        search_result_cache.drop_collection(collection_id)
+
+def _result_bytes(results: list[dict]) -> int:
+    """결과 목록이 차지하는 메모리를 대략 계산합니다. 대부분 청크 내용이므로 그 길이에 행마다 고정 비용을 더합니다."""
+    return sum(len(row.get("content") or "") * 2 + 512 for row in results) + 256
+
+class SearchResultCache:
+    """컬렉션 버전을 키에 포함하는 메모리 크기 제한 LRU 검색 결과 캐시입니다."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._total_bytes = 0
+        self._entries: OrderedDict[tuple, tuple[float, int, list[dict]]] = OrderedDict()
+
+    def make_key(self, owner_id: str, collection_id: str, version: int, query: str, match_count: int, *params) -> tuple:
+        """조회 시점의 컬렉션 버전을 포함한 키를 만듭니다. 검색 전에 만들어 두고 저장할 때 그대로 사용합니다."""
+        return (str(owner_id), collection_id, version, normalize_query(query), match_count, *params)
+
+    def get(self, key: tuple) -> list[dict] | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def put(self, key: tuple, results: list[dict]):
+        size = _result_bytes(results)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, results)
+        self._total_bytes += size
+        while self._total_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: tuple):
+        _, size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def drop_collection(self, collection_id: str):
+        """이전 버전의 결과가 메모리를 차지하지 않도록 바로 지웁니다."""
+        for key in [key for key in self._entries if key[1] == collection_id]:
+            self._remove(key)
+
+    def stats(self) -> dict:
+        """적중률 등 캐시 통계를 반환합니다."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "size_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+search_result_cache: SearchResultCache | None = (
+    SearchResultCache(SEARCH_RESULT_CACHE_MAX_MB * 1024 * 1024, SEARCH_RESULT_CACHE_TTL_SECONDS)
+    if SEARCH_RESULT_CACHE_MAX_MB > 0 else None
+)
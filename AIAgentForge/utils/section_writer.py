@@ -0,0 +1,217 @@
+# AIAgentForge/utils/section_writer.py
+import os
+import uuid
+import random
+import hashlib
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from postgrest import SyncPostgrestClient
+from .vector_settings import EMBEDDING_STORAGE
+from .embedder import get_embedding_model
+
+logger = logging.getLogger(__name__)
+
+# 한 번의 RPC 요청에 담을 최대 크기. PostgREST 요청 크기 제한과 타임아웃보다 충분히 작게 잡습니다.
+SECTION_PAGE_MAX_BYTES = int(os.getenv("SECTION_PAGE_MAX_BYTES", str(2 * 1024 * 1024)))
+SECTION_PAGE_MAX_ROWS = int(os.getenv("SECTION_PAGE_MAX_ROWS", "500"))
+SECTION_WRITE_CONCURRENCY = int(os.getenv("SECTION_WRITE_CONCURRENCY", "4"))
+SECTION_WRITE_MAX_RETRIES = int(os.getenv("SECTION_WRITE_MAX_RETRIES", "3"))
+
+class SectionWriteError(Exception):
+    """재시도 후에도 저장하지 못한 페이지가 남은 경우 발생합니다."""
+
+    def __init__(self, failed_pages: list[int], total_pages: int, last_error: Exception):
+        self.failed_pages = failed_pages
+        super().__init__(f"{total_pages}개 중 {len(failed_pages)}개 페이지 저장 실패: {last_error}")
+
+def hash_chunk(text: str) -> str:
+    """청크 텍스트의 sha256. document_sections.content_hash와 같은 값입니다."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def make_section_ids(document_id: str, chunks: list[dict]) -> list[str]:
+    """문서 ID와 청크 내용으로 결정적인 section id를 만듭니다.
+
+    같은 내용이 한 문서에 여러 번 나오면 등장 순서를 함께 사용합니다.
+    같은 문서를 다시 처리해도 같은 id가 나오므로 재시도와 재개가 중복 행을 만들지 않습니다.
+    """
+    namespace = uuid.UUID(str(document_id))
+    seen: dict[str, int] = {}
+    ids = []
+    for chunk in chunks:
+        digest = hash_chunk(chunk["text"])
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        ids.append(str(uuid.uuid5(namespace, f"{digest}:{occurrence}")))
+    return ids
+
+@dataclass
+class SectionUpdatePlan:
+    """새 버전 문서를 기존 document_sections와 비교한 결과입니다."""
+    insert_indices: list[int]  # 새로 임베딩하고 저장할 청크의 인덱스
+    insert_ids: list[str]  # 위 청크들에 부여할 section id
+    stale_ids: list[str]  # 새 버전에 더 이상 없는 기존 section id
+    kept_count: int
+
+def plan_section_update(
+    document_id: str, chunks: list[dict], existing: list[dict], embedding_model: str | None = None
+) -> SectionUpdatePlan:
+    """청크 내용 해시로 기존 section과 새 청크를 짝지어 바뀐 부분만 골라냅니다.
+
+    existing은 기존 행의 {"id", "content_hash", "embedding_model"} 목록입니다. 먼저 결정적 id가 같은 행을 그대로 두고,
+    결정적 id 도입 이전에 저장된 행은 content_hash가 같으면 재사용합니다.
+    embedding_model을 지정하면 다른 모델로 만든 행은 재사용하지 않고 다시 임베딩합니다.
+    """
+    if embedding_model is not None:
+        reusable = [row for row in existing if row.get("embedding_model") in (None, embedding_model)]
+    else:
+        reusable = existing
+    new_ids = make_section_ids(document_id, chunks)
+    existing_ids = {row["id"] for row in reusable}
+    new_id_set = set(new_ids)
+
+    # 결정적 id로 짝지어지지 않은 기존 행을 해시별로 모아 둡니다.
+    legacy_by_hash: dict[str, list[str]] = {}
+    for row in reusable:
+        if row["id"] not in new_id_set and row.get("content_hash"):
+            legacy_by_hash.setdefault(row["content_hash"], []).append(row["id"])
+
+    kept: set[str] = set()
+    insert_indices: list[int] = []
+    insert_ids: list[str] = []
+    for index, (section_id, chunk) in enumerate(zip(new_ids, chunks)):
+        if section_id in existing_ids:
+            kept.add(section_id)
+            continue
+        legacy = legacy_by_hash.get(hash_chunk(chunk["text"]))
+        if legacy:
+            kept.add(legacy.pop())
+            continue
+        insert_indices.append(index)
+        insert_ids.append(section_id)
+
+    # 다시 임베딩하는 행은 저장 시 같은 id로 덮어쓰므로 삭제 대상에서 뺍니다.
+    insert_id_set = set(insert_ids)
+    stale_ids = [row["id"] for row in existing if row["id"] not in kept and row["id"] not in insert_id_set]
+    return SectionUpdatePlan(insert_indices, insert_ids, stale_ids, len(kept))
+
+def format_vector(embedding: list[float]) -> str:
+    """pgvector 텍스트 형식('[0.1,0.2,...]')으로 변환합니다.
+    float32 정밀도에 맞춘 7자리 유효숫자로 JSON 배열보다 짧게 표현합니다."""
+    return "[" + ",".join(f"{value:.7g}" for value in embedding) + "]"
+
+def _paginate(rows: list[dict]) -> list[list[dict]]:
+    """행 목록을 크기와 개수 한도를 지키는 페이지로 나눕니다."""
+    pages: list[list[dict]] = []
+    page: list[dict] = []
+    page_bytes = 0
+    for row in rows:
+        row_bytes = len(row["content"].encode("utf-8")) + len(row["embedding"]) + 64
+        if page and (page_bytes + row_bytes > SECTION_PAGE_MAX_BYTES or len(page) >= SECTION_PAGE_MAX_ROWS):
+            pages.append(page)
+            page, page_bytes = [], 0
+        page.append(row)
+        page_bytes += row_bytes
+    if page:
+        pages.append(page)
+    return pages
+
+def _insert_page(db_client: SyncPostgrestClient, document_id: str, collection_id: str | None, page: list[dict]) -> int:
+    response = db_client.rpc(
+        "insert_document_sections",
+        {
+            "p_document_id": document_id,
+            "p_ids": [row["id"] for row in page],
+            "p_contents": [row["content"] for row in page],
+            "p_embeddings": [row["embedding"] for row in page],
+            "p_page_numbers": [row["page_number"] for row in page],
+            "p_content_hashes": [row["content_hash"] for row in page],
+            "p_vector_type": EMBEDDING_STORAGE,
+            "p_embedding_model": get_embedding_model(),
+            "p_collection_id": collection_id,
+        },
+    ).execute()
+    return response.data or 0
+
+async def write_sections(
+    db_client: SyncPostgrestClient,
+    document_id: str,
+    chunks: list[dict],
+    embeddings: list[list[float]],
+    on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+    section_ids: list[str] | None = None,
+    collection_id: str | None = None,
+) -> int:
+    """청크와 임베딩을 페이지 단위 RPC 호출로 document_sections에 저장합니다.
+
+    페이지들은 제한된 동시성으로 전송되고, 실패한 페이지만 재시도합니다.
+    각 행의 id는 make_section_ids로 결정되고 서버에서 ON CONFLICT DO NOTHING으로 처리하므로
+    다시 보낸 페이지나 재개된 문서도 중복 저장되지 않습니다.
+    문서 일부만 저장할 때는 plan_section_update가 정한 section_ids를 넘겨줍니다.
+    collection_id는 검색 시 조인 없이 거를 수 있도록 각 행에 함께 저장됩니다.
+    """
+    if section_ids is None:
+        section_ids = make_section_ids(document_id, chunks)
+    rows = [
+        {
+            "id": section_id,
+            "content": chunk["text"],
+            "content_hash": hash_chunk(chunk["text"]),
+            "embedding": format_vector(embedding),
+            "page_number": chunk.get("page"),
+        }
+        for section_id, chunk, embedding in zip(section_ids, chunks, embeddings)
+    ]
+    pages = _paginate(rows)
+    semaphore = asyncio.Semaphore(SECTION_WRITE_CONCURRENCY)
+    done_pages = 0
+
+    async def send(page_no: int, page: list[dict]) -> int:
+        nonlocal done_pages
+        for attempt in range(SECTION_WRITE_MAX_RETRIES + 1):
+            try:
+                async with semaphore:
+                    # 동기 클라이언트이므로 스레드에서 실행해 이벤트 루프를 막지 않습니다.
+                    inserted = await asyncio.to_thread(_insert_page, db_client, document_id, collection_id, page)
+                break
+            except Exception as e:
+                if attempt == SECTION_WRITE_MAX_RETRIES:
+                    raise
+                delay = random.uniform(0, 0.5 * 2 ** attempt)
+                logger.warning(f"Section page {page_no} insert failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        done_pages += 1
+        if on_progress is not None:
+            await on_progress(done_pages, len(pages))
+        return inserted
+
+    results = await asyncio.gather(
+        *(send(page_no, page) for page_no, page in enumerate(pages)),
+        return_exceptions=True,
+    )
+    failed = [page_no for page_no, result in enumerate(results) if isinstance(result, Exception)]
+    if failed:
+        raise SectionWriteError(failed, len(pages), results[failed[0]])
+    return sum(results)
+
+def fetch_section_hashes(db_client: SyncPostgrestClient, document_id: str, page_size: int = 1000) -> list[dict]:
+    """문서의 기존 section id, content_hash, embedding_model을 모두 가져옵니다. (PostgREST 행 수 제한을 넘지 않도록 나눠 조회)"""
+    rows: list[dict] = []
+    while True:
+        response = db_client.from_("document_sections").select("id, content_hash, embedding_model") \
+            .eq("document_id", document_id).order("id") \
+            .range(len(rows), len(rows) + page_size - 1).execute()
+        rows.extend(response.data)
+        if len(response.data) < page_size:
+            return rows
+
+def delete_sections(db_client: SyncPostgrestClient, document_id: str, section_ids: list[str]) -> int:
+    """더 이상 쓰이지 않는 section들을 한 번의 RPC로 삭제합니다."""
+    if not section_ids:
+        return 0
+    response = db_client.rpc(
+        "delete_document_sections",
+        {"p_document_id": document_id, "p_ids": section_ids},
+    ).execute()
+    return response.data or 0
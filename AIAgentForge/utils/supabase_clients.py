@@ -0,0 +1,245 @@
+# AIAgentForge/utils/supabase_clients.py
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import jwt
+import httpx
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+from storage3 import AsyncStorageClient, SyncStorageClient
+from supabase_auth import AsyncGoTrueClient
+
+# 사용자 토큰별 클라이언트를 몇 개까지 보관할지. 넘으면 가장 오래 쓰이지 않은 것부터 내립니다.
+CLIENT_CACHE_MAX_TOKENS = int(os.getenv("CLIENT_CACHE_MAX_TOKENS", "512"))
+# 워커 하나가 Supabase와 유지할 연결 수
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "100"))
+SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "20"))
+SUPABASE_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "120"))
+# 만료 시각을 읽을 수 없는 토큰을 보관할 시간
+DEFAULT_TOKEN_TTL_SECONDS = 300
+
+_transport: httpx.HTTPTransport | None = None
+_transport_lock = threading.Lock()
+
+def _shared_transport() -> httpx.HTTPTransport:
+    """워커 프로세스 전체가 공유하는 HTTP/2 keep-alive 연결 풀입니다."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = httpx.HTTPTransport(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=SUPABASE_MAX_CONNECTIONS,
+                        max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+                    ),
+                )
+    return _transport
+
+def _pooled_http_client() -> httpx.Client:
+    """공유 연결 풀을 쓰는 가벼운 httpx 클라이언트. 헤더와 base_url만 각자 가집니다.
+
+    닫으면 공유 연결 풀까지 닫히므로 close()나 with 문으로 닫지 않습니다.
+    """
+    return httpx.Client(
+        transport=_shared_transport(),
+        timeout=SUPABASE_TIMEOUT_SECONDS,
+        follow_redirects=True,
+    )
+
+_async_transport: httpx.AsyncHTTPTransport | None = None
+
+def _shared_async_transport() -> httpx.AsyncHTTPTransport:
+    """이벤트 루프에서 await로 호출하는 클라이언트들이 공유하는 HTTP/2 연결 풀입니다.
+
+    연결은 처음 만든 이벤트 루프에 묶이므로 워커의 이벤트 루프(Reflex 핸들러, FastAPI 엔드포인트)에서만 사용합니다.
+    """
+    global _async_transport
+    if _async_transport is None:
+        _async_transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=SUPABASE_MAX_CONNECTIONS,
+                max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+            ),
+        )
+    return _async_transport
+
+def _pooled_async_http_client() -> httpx.AsyncClient:
+    """공유 비동기 연결 풀을 쓰는 httpx 클라이언트. _pooled_http_client와 마찬가지로 닫지 않습니다."""
+    return httpx.AsyncClient(
+        transport=_shared_async_transport(),
+        timeout=SUPABASE_TIMEOUT_SECONDS,
+        follow_redirects=True,
+    )
+
+def _auth_headers(access_token: str) -> dict[str, str]:
+    return {
+        "apikey": os.getenv("SUPABASE_ANON_KEY", ""),
+        "Authorization": f"Bearer {access_token}",
+    }
+
+def token_expires_at(access_token: str) -> float:
+    """JWT의 exp(만료 시각, epoch 초)를 서명 검증 없이 읽습니다. 읽을 수 없으면 기본 TTL 뒤로 봅니다."""
+    try:
+        exp = jwt.decode(access_token, options={"verify_signature": False}).get("exp")
+        if exp:
+            return float(exp)
+    except jwt.PyJWTError:
+        pass
+    return time.time() + DEFAULT_TOKEN_TTL_SECONDS
+
+class _TokenClients:
+    """토큰 하나에 대한 클라이언트 묶음. 필요한 클라이언트만 처음 사용할 때 만듭니다."""
+
+    def __init__(self, access_token: str):
+        self.access_token = access_token
+        self.expires_at = token_expires_at(access_token)
+        self._postgrest: SyncPostgrestClient | None = None
+        self._storage: SyncStorageClient | None = None
+        self._async_postgrest: AsyncPostgrestClient | None = None
+        self._async_storage: AsyncStorageClient | None = None
+
+    @property
+    def postgrest(self) -> SyncPostgrestClient:
+        if self._postgrest is None:
+            self._postgrest = SyncPostgrestClient(
+                f"{os.getenv('SUPABASE_URL')}/rest/v1",
+                headers=_auth_headers(self.access_token),
+                http_client=_pooled_http_client(),
+            )
+        return self._postgrest
+
+    @property
+    def storage(self) -> SyncStorageClient:
+        if self._storage is None:
+            self._storage = SyncStorageClient(
+                f"{os.getenv('SUPABASE_URL')}/storage/v1/",
+                _auth_headers(self.access_token),
+                http_client=_pooled_http_client(),
+            )
+        return self._storage
+
+    @property
+    def async_postgrest(self) -> AsyncPostgrestClient:
+        if self._async_postgrest is None:
+            self._async_postgrest = AsyncPostgrestClient(
+                f"{os.getenv('SUPABASE_URL')}/rest/v1",
+                headers=_auth_headers(self.access_token),
+                http_client=_pooled_async_http_client(),
+            )
+        return self._async_postgrest
+
+    @property
+    def async_storage(self) -> AsyncStorageClient:
+        if self._async_storage is None:
+            self._async_storage = AsyncStorageClient(
+                f"{os.getenv('SUPABASE_URL')}/storage/v1/",
+                _auth_headers(self.access_token),
+                http_client=_pooled_async_http_client(),
+            )
+        return self._async_storage
+
+class ClientFactory:
+    """사용자 토큰별 PostgREST/Storage 클라이언트를 LRU로 보관합니다.
+
+    이벤트 루프에서는 async_postgrest/async_storage를 await해서 사용하고, 동기 클라이언트는
+    asyncio.to_thread로 실행하는 작업(문서 수집 파이프라인, 로컬 인덱스 적재)에서만 사용합니다.
+
+    토큰마다 헤더만 다른 가벼운 클라이언트를 만들고, 실제 연결은 공유 연결 풀을 사용하므로
+    핸들러가 여러 번 호출되어도 새 연결(TLS 핸드셰이크)을 열지 않습니다. 만료된 토큰의 클라이언트는 조회 시 내립니다.
+    """
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._entries: OrderedDict[str, _TokenClients] = OrderedDict()
+        # 동기 클라이언트는 asyncio.to_thread 안에서도 조회되므로 스레드 잠금을 사용합니다.
+        self._lock = threading.Lock()
+        self._anon_postgrest: AsyncPostgrestClient | None = None
+        self._auth: AsyncGoTrueClient | None = None
+
+    def _get(self, access_token: str) -> _TokenClients:
+        # 토큰 원문 대신 해시를 키로 사용합니다.
+        key = hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                # 새 토큰이 들어올 때 만료된 토큰의 클라이언트도 함께 정리합니다.
+                for expired_key in [k for k, e in self._entries.items() if e.expires_at <= now]:
+                    del self._entries[expired_key]
+                    self.expired += 1
+                entry = _TokenClients(access_token)
+                self._entries[key] = entry
+                while len(self._entries) > self.max_tokens:
+                    self._entries.popitem(last=False)
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return entry
+
+    def postgrest(self, access_token: str) -> SyncPostgrestClient:
+        """토큰으로 인증된 PostgREST 클라이언트를 반환합니다."""
+        return self._get(access_token).postgrest
+
+    def storage(self, access_token: str) -> SyncStorageClient:
+        """토큰으로 인증된 Storage 클라이언트를 반환합니다."""
+        return self._get(access_token).storage
+
+    def async_postgrest(self, access_token: str) -> AsyncPostgrestClient:
+        """토큰으로 인증된 비동기 PostgREST 클라이언트를 반환합니다."""
+        return self._get(access_token).async_postgrest
+
+    def async_storage(self, access_token: str) -> AsyncStorageClient:
+        """토큰으로 인증된 비동기 Storage 클라이언트를 반환합니다."""
+        return self._get(access_token).async_storage
+
+    def anon_postgrest(self) -> AsyncPostgrestClient:
+        """로그인하지 않은 사용자 권한(anon key)의 비동기 PostgREST 클라이언트를 반환합니다."""
+        if self._anon_postgrest is None:
+            anon_key = os.getenv("SUPABASE_ANON_KEY", "")
+            self._anon_postgrest = AsyncPostgrestClient(
+                f"{os.getenv('SUPABASE_URL')}/rest/v1",
+                headers=_auth_headers(anon_key),
+                http_client=_pooled_async_http_client(),
+            )
+        return self._anon_postgrest
+
+    def auth(self) -> AsyncGoTrueClient:
+        """Supabase Auth 비동기 클라이언트를 반환합니다.
+
+        여러 사용자가 함께 쓰므로 세션을 클라이언트에 저장하거나 자동 갱신하지 않습니다.
+        토큰이 필요한 호출에는 항상 토큰을 직접 넘기고, 로그아웃은 auth().admin.sign_out(access_token)을 사용합니다.
+        """
+        if self._auth is None:
+            anon_key = os.getenv("SUPABASE_ANON_KEY", "")
+            self._auth = AsyncGoTrueClient(
+                url=f"{os.getenv('SUPABASE_URL')}/auth/v1",
+                headers=_auth_headers(anon_key),
+                auto_refresh_token=False,
+                persist_session=False,
+                http_client=_pooled_async_http_client(),
+            )
+        return self._auth
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "tokens": len(self._entries),
+            "max_tokens": self.max_tokens,
+        }
+
+client_factory = ClientFactory(CLIENT_CACHE_MAX_TOKENS)
@@ -1,36 +1,115 @@
 # langconnect_fullstack/utils/text_extractor.py
 import io
+import os
+import mmap
+import codecs
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
 from docx import Document
 from PyPDF2 import PdfReader
 
-def extract_text_from_pdf(file_content: bytes) -> str:
-    """PDF 파일 내용(bytes)에서 텍스트를 추출합니다."""
-    text = ""
-    with io.BytesIO(file_content) as pdf_file:
-        reader = PdfReader(pdf_file)
-        for page in reader.pages:
-            text += page.extract_text() or ""
-    return text
+PDF_MIME_TYPE = "application/pdf"
+DOCX_MIME_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
 
-def extract_text_from_docx(file_content: bytes) -> str:
-    """DOCX 파일 내용(bytes)에서 텍스트를 추출합니다."""
-    text = ""
-    with io.BytesIO(file_content) as docx_file:
-        doc = Document(docx_file)
+# 파일 내용(bytes), 파일 경로, 또는 read/seek를 지원하는 파일 객체를 모두 받습니다.
+FileSource = bytes | str | os.PathLike | BinaryIO
+
+# DOCX 문단을 이 글자 수 단위로 묶어 하나의 블록으로 내보냅니다.
+DOCX_BLOCK_CHARS = 4000
+TEXT_READ_BYTES = 64 * 1024
+
+@contextmanager
+def open_source(source: FileSource, use_mmap: bool = True) -> Iterator[BinaryIO]:
+    """소스를 읽기 가능한 바이너리 스트림으로 엽니다. 파일 경로는 mmap으로 매핑합니다.
+
+    mmap 객체에는 seekable()이 없어 zipfile(DOCX)이 열지 못하므로, 그런 경우에는 use_mmap=False로 일반 파일 객체를 받습니다.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        with io.BytesIO(source) as stream:
+            yield stream
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            if not use_mmap:
+                yield f
+                return
+            if os.fstat(f.fileno()).st_size == 0:
+                yield io.BytesIO(b"")
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+    else:
+        yield source
+
+def iter_pdf_pages(source: FileSource, max_pages: int | None = None) -> Iterator[tuple[int, str]]:
+    """PDF에서 (페이지 번호, 텍스트)를 한 페이지씩 생성합니다. 페이지 번호는 1부터 시작합니다."""
+    with open_source(source) as stream:
+        reader = PdfReader(stream)
+        for index, page in enumerate(reader.pages):
+            if max_pages is not None and index >= max_pages:
+                break
+            yield index + 1, page.extract_text() or ""
+
+def iter_docx_blocks(source: FileSource, max_blocks: int | None = None) -> Iterator[tuple[int, str]]:
+    """DOCX 문단을 일정 길이의 블록으로 묶어 (블록 번호, 텍스트)를 생성합니다. max_blocks가 주어지면 앞쪽 블록만 처리합니다."""
+    with open_source(source, use_mmap=False) as stream:
+        doc = Document(stream)
+        block: list[str] = []
+        block_len = 0
+        block_no = 1
         for para in doc.paragraphs:
-            text += para.text + "\n"
-    return text
+            block.append(para.text + "\n")
+            block_len += len(para.text) + 1
+            if block_len >= DOCX_BLOCK_CHARS:
+                yield block_no, "".join(block)
+                block, block_len = [], 0
+                block_no += 1
+                if max_blocks is not None and block_no > max_blocks:
+                    return
+        if block:
+            yield block_no, "".join(block)
 
-def extract_text_from_file(file_content: bytes, mime_type: str) -> str:
-    """MIME 타입에 따라 적절한 텍스트 추출 함수를 호출합니다."""
-    if mime_type == "application/pdf":
-        return extract_text_from_pdf(file_content)
-    elif mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        return extract_text_from_docx(file_content)
-    # TODO: 다른 파일 형식(예:.txt,.md)에 대한 처리 추가
+def iter_plain_text(source: FileSource, max_blocks: int | None = None) -> Iterator[tuple[int | None, str]]:
+    """일반 텍스트 파일을 UTF-8로 조금씩 디코딩하여 (None, 텍스트)를 생성합니다.
+    텍스트 파일에는 페이지가 없으므로 페이지 번호는 None입니다. max_blocks가 주어지면 앞쪽 TEXT_READ_BYTES 블록만 처리합니다.
+
+    UTF-8로 읽을 수 없는 바이트가 있으면 (파일 중간이라도) ValueError를 던져 문서 처리를 실패시킵니다.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open_source(source) as stream:
+        blocks = 0
+        while max_blocks is None or blocks < max_blocks:
+            data = stream.read(TEXT_READ_BYTES)
+            blocks += 1
+            try:
+                text = decoder.decode(data, final=not data)
+            except UnicodeDecodeError as e:
+                raise ValueError("지원하지 않는 파일 형식이거나 UTF-8 텍스트로 읽을 수 없습니다.") from e
+            if text:
+                yield None, text
+            if not data:
+                break
+
+def iter_text_from_file(
+    source: FileSource, mime_type: str, max_pages: int | None = None
+) -> Iterator[tuple[int | None, str]]:
+    """MIME 타입에 따라 (페이지/블록 번호, 텍스트)를 순서대로 생성합니다. 텍스트 파일의 번호는 None입니다.
+    max_pages는 PDF 페이지 수, DOCX/텍스트는 블록 수의 상한입니다."""
+    if mime_type == PDF_MIME_TYPE:
+        yield from iter_pdf_pages(source, max_pages)
+    elif mime_type == DOCX_MIME_TYPE:
+        yield from iter_docx_blocks(source, max_pages)
     else:
         # 지원하지 않는 형식의 경우, 텍스트로 디코딩 시도
-        try:
-            return file_content.decode('utf-8')
-        except UnicodeDecodeError:
-            return "지원하지 않는 파일 형식이거나 텍스트를 추출할 수 없습니다."
+        yield from iter_plain_text(source, max_pages)
+
+def extract_text_from_pdf(file_content: bytes, max_pages: int | None = None) -> str:
+    """PDF 파일 내용(bytes)에서 텍스트를 추출합니다. max_pages가 주어지면 앞쪽 페이지만 처리합니다."""
+    return "".join(text for _, text in iter_pdf_pages(file_content, max_pages))
+
+def extract_text_from_docx(file_content: bytes) -> str:
+    """DOCX 파일 내용(bytes)에서 텍스트를 추출합니다."""
+    return "".join(text for _, text in iter_docx_blocks(file_content))
+
+def extract_text_from_file(file_content: bytes, mime_type: str, max_pages: int | None = None) -> str:
+    """MIME 타입에 따라 적절한 텍스트 추출 함수를 호출합니다."""
+    return "".join(text for _, text in iter_text_from_file(file_content, mime_type, max_pages))
@@ -0,0 +1,210 @@
+# AIAgentForge/utils/token_verifier.py
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+import jwt
+from jwt.algorithms import has_crypto
+from gotrue.types import User
+from .supabase_clients import client_factory, _pooled_async_http_client
+
+logger = logging.getLogger(__name__)
+
+# 레거시 HS256 프로젝트의 JWT Secret. 설정하지 않으면 HS256 토큰은 Auth 서버에서 확인합니다.
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET", "")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+# 서버 간 시계 차이를 허용할 범위(초)
+JWT_LEEWAY_SECONDS = int(os.getenv("JWT_LEEWAY_SECONDS", "10"))
+# 비대칭 서명 키(JWKS)를 다시 받아 오는 주기. 모르는 kid가 오면(키 교체) 주기와 상관없이 다시 받아 옵니다.
+JWKS_CACHE_TTL_SECONDS = float(os.getenv("JWKS_CACHE_TTL_SECONDS", "600"))
+JWKS_REFRESH_MIN_INTERVAL_SECONDS = 30
+# 검증된 토큰의 사용자 정보를 보관하는 시간과 개수. 0으로 설정하면 보관하지 않습니다.
+# 이 시간 동안은 토큰이 서버에서 폐기(로그아웃)되어도 알 수 없으므로 짧게 유지합니다.
+VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv("VERIFIED_TOKEN_CACHE_SIZE", "4096"))
+VERIFIED_TOKEN_CACHE_TTL_SECONDS = float(os.getenv("VERIFIED_TOKEN_CACHE_TTL_SECONDS", "60"))
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+class TokenVerificationError(Exception):
+    """토큰이 유효하지 않거나 만료되었습니다."""
+
+class JwksCache:
+    """Supabase Auth의 서명 공개 키(JWKS)를 kid별로 보관합니다."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.fetches = 0
+        self._keys: dict[str, jwt.PyJWK] = {}
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _fetch(self):
+        response = await _pooled_async_http_client().get(
+            f"{os.getenv('SUPABASE_URL')}/auth/v1/.well-known/jwks.json",
+            headers={"apikey": os.getenv("SUPABASE_ANON_KEY", "")},
+        )
+        response.raise_for_status()
+        keys = {}
+        for data in response.json().get("keys", []):
+            try:
+                key = jwt.PyJWK.from_dict(data)
+            except jwt.PyJWKError:
+                logger.warning(f"Skipping unsupported JWKS key {data.get('kid')}")
+                continue
+            if key.key_id:
+                keys[key.key_id] = key
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        self.fetches += 1
+
+    async def get(self, kid: str | None) -> jwt.PyJWK | None:
+        """kid에 해당하는 키를 반환합니다. 없으면 키 교체일 수 있으므로 (너무 자주는 아니게) 다시 받아 옵니다."""
+        age = time.monotonic() - self._fetched_at
+        if kid in self._keys and age < self.ttl_seconds:
+            return self._keys[kid]
+        async with self._lock:
+            age = time.monotonic() - self._fetched_at
+            if age >= self.ttl_seconds or (kid not in self._keys and age >= JWKS_REFRESH_MIN_INTERVAL_SECONDS):
+                try:
+                    await self._fetch()
+                except Exception as e:
+                    # 받아 오지 못하면 이전 키로 계속 검증합니다.
+                    logger.warning(f"Failed to fetch JWKS: {e}")
+        return self._keys.get(kid)
+
+def _user_from_claims(claims: dict) -> User:
+    """검증된 JWT 클레임으로 User를 만듭니다.
+
+    토큰에는 가입 시각(created_at) 같은 계정 정보가 없으므로 그런 필드는 비워 둡니다. (검증을 건너뛰는 model_construct 사용)
+    필요한 곳에서는 Auth 서버에서 사용자를 다시 불러와야 합니다.
+    """
+    audience = claims.get("aud") or ""
+    return User.model_construct(
+        id=claims["sub"],
+        aud=audience if isinstance(audience, str) else audience[0],
+        email=claims.get("email") or None,
+        phone=claims.get("phone") or None,
+        role=claims.get("role"),
+        app_metadata=claims.get("app_metadata") or {},
+        user_metadata=claims.get("user_metadata") or {},
+        is_anonymous=claims.get("is_anonymous", False),
+    )
+
+class TokenVerifier:
+    """Supabase access token을 로컬에서 검증하고, 검증된 결과를 토큰 해시별로 잠시 보관합니다.
+
+    - 서명과 만료(exp), audience는 JWKS 공개 키(RS256/ES256) 또는 SUPABASE_JWT_SECRET(HS256)으로 로컬에서 확인합니다.
+    - 로컬에서 확인할 수 없는 토큰(HS256인데 secret이 없거나 cryptography가 없는 경우)은 Auth 서버에 묻습니다.
+    - remote=True이면 캐시와 로컬 검증을 건너뛰고 Auth 서버에서 확인합니다. 로그아웃/권한 변경이 바로 반영되어야 하는
+      경로(관리자 페이지 등)에서 사용합니다.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.local_verifications = 0
+        self.remote_verifications = 0
+        self.failures = 0
+        self.jwks = JwksCache(JWKS_CACHE_TTL_SECONDS)
+        self._entries: OrderedDict[str, tuple[float, User]] = OrderedDict()
+        self._warned_no_crypto = False
+
+    def _lookup(self, key: str) -> User | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key: str, user: User, expires_at: float):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (min(time.time() + self.ttl_seconds, expires_at), user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _signing_key(self, token: str):
+        """토큰 헤더의 알고리즘에 맞는 검증 키를 반환합니다. 로컬에서 검증할 수 없으면 None입니다."""
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+        if algorithm == "HS256":
+            return (SUPABASE_JWT_SECRET, algorithm) if SUPABASE_JWT_SECRET else None
+        if algorithm in ASYMMETRIC_ALGORITHMS:
+            if not has_crypto:
+                if not self._warned_no_crypto:
+                    logger.warning("cryptography is not installed; verifying asymmetric JWTs with the Auth server.")
+                    self._warned_no_crypto = True
+                return None
+            key = await self.jwks.get(header.get("kid"))
+            if key is None or key.algorithm_name != algorithm:
+                raise TokenVerificationError("알 수 없는 서명 키입니다.")
+            return key.key, algorithm
+        raise TokenVerificationError(f"지원하지 않는 서명 알고리즘입니다: {algorithm}")
+
+    async def _verify_remote(self, token: str) -> User:
+        self.remote_verifications += 1
+        try:
+            response = await client_factory.auth().get_user(token)
+        except Exception as e:
+            raise TokenVerificationError(str(e)) from e
+        if not response or not response.user:
+            raise TokenVerificationError("토큰에 해당하는 사용자가 없습니다.")
+        return response.user
+
+    async def verify(self, token: str, remote: bool = False) -> User:
+        """토큰을 검증하고 사용자를 반환합니다. 유효하지 않으면 TokenVerificationError를 던집니다."""
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        if not remote:
+            user = self._lookup(key)
+            if user is not None:
+                self.hits += 1
+                return user
+        try:
+            signing_key = None if remote else await self._signing_key(token)
+            if signing_key is None:
+                user = await self._verify_remote(token)
+                expires_at = jwt.decode(token, options={"verify_signature": False}).get("exp") or time.time()
+            else:
+                self.local_verifications += 1
+                claims = jwt.decode(
+                    token,
+                    signing_key[0],
+                    algorithms=[signing_key[1]],
+                    audience=SUPABASE_JWT_AUDIENCE,
+                    leeway=JWT_LEEWAY_SECONDS,
+                    options={"require": ["exp", "sub"]},
+                )
+                user = _user_from_claims(claims)
+                expires_at = claims["exp"]
+        except jwt.PyJWTError as e:
+            self.failures += 1
+            raise TokenVerificationError(str(e)) from e
+        except TokenVerificationError:
+            self.failures += 1
+            raise
+        self._store(key, user, float(expires_at))
+        return user
+
+    def forget(self, token: str):
+        """로그아웃한 토큰을 캐시에서 지웁니다."""
+        self._entries.pop(hashlib.sha256(token.encode("utf-8")).hexdigest(), None)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "local_verifications": self.local_verifications,
+            "remote_verifications": self.remote_verifications,
+            "failures": self.failures,
+            "entries": len(self._entries),
+            "jwks_keys": len(self.jwks._keys),
+            "jwks_fetches": self.jwks.fetches,
+        }
+
+token_verifier = TokenVerifier(VERIFIED_TOKEN_CACHE_SIZE, VERIFIED_TOKEN_CACHE_TTL_SECONDS)
@@ -0,0 +1,180 @@
+# AIAgentForge/utils/upload_spool.py
+import os
+import time
+import asyncio
+import base64
+import hashlib
+import logging
+import tempfile
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 업로드 파일을 메모리에 모두 올리지 않고 임시 파일에 조금씩 기록합니다.
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+UPLOAD_READ_CHUNK_BYTES = 1024 * 1024
+
+# 이 크기를 넘는 파일은 Supabase Storage의 재개 가능한(TUS) 업로드로 나누어 전송합니다.
+# Supabase는 마지막 조각을 제외한 모든 조각이 정확히 6MB이기를 요구합니다.
+TUS_CHUNK_BYTES = 6 * 1024 * 1024
+RESUMABLE_UPLOAD_THRESHOLD = int(os.getenv("RESUMABLE_UPLOAD_THRESHOLD", str(TUS_CHUNK_BYTES)))
+STORAGE_MAX_RETRIES = int(os.getenv("STORAGE_MAX_RETRIES", "3"))
+STORAGE_TIMEOUT_SECONDS = float(os.getenv("STORAGE_TIMEOUT_SECONDS", "60"))
+
+class StorageUploadError(Exception):
+    """스토리지 업로드가 재시도 후에도 실패한 경우 발생합니다."""
+
+def _new_spool_file():
+    return tempfile.NamedTemporaryFile(prefix="upload-", dir=UPLOAD_SPOOL_DIR, delete=False)
+
+async def spool_upload(file) -> tuple[str, str, int]:
+    """업로드 파일을 조각 단위로 읽어 임시 파일에 기록합니다.
+
+    기록하면서 sha256을 함께 계산하므로 내용을 다시 읽지 않습니다.
+    (임시 파일 경로, sha256, 크기)를 반환하며, 다 쓴 파일은 remove_spool로 지워야 합니다.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    spool = _new_spool_file()
+    try:
+        with spool:
+            while True:
+                data = await file.read(UPLOAD_READ_CHUNK_BYTES)
+                if not data:
+                    break
+                digest.update(data)
+                size += len(data)
+                await asyncio.to_thread(spool.write, data)
+    except BaseException:
+        remove_spool(spool.name)
+        raise
+    return spool.name, digest.hexdigest(), size
+
+def remove_spool(path: str | None):
+    """임시 파일을 지웁니다. 이미 없으면 무시합니다."""
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Failed to remove spooled upload {path}: {e}")
+
+def _storage_headers(access_token: str) -> dict:
+    return {
+        "Authorization": f"Bearer {access_token}",
+        "apikey": os.getenv("SUPABASE_ANON_KEY", ""),
+    }
+
+def _encode_metadata(metadata: dict[str, str]) -> str:
+    return ",".join(
+        f"{key} {base64.b64encode(value.encode('utf-8')).decode('ascii')}"
+        for key, value in metadata.items()
+    )
+
+def _upload_resumable(
+    client: httpx.Client, access_token: str, bucket: str, object_path: str, spool_path: str, content_type: str
+):
+    """TUS 프로토콜로 파일을 6MB 조각씩 전송합니다.
+
+    조각 전송이 실패하면 서버에 기록된 오프셋을 HEAD로 확인하고 그 위치부터 이어서 보냅니다.
+    """
+    size = os.path.getsize(spool_path)
+    base_headers = {**_storage_headers(access_token), "Tus-Resumable": "1.0.0"}
+    create = client.post(
+        f"{os.getenv('SUPABASE_URL')}/storage/v1/upload/resumable",
+        headers={
+            **base_headers,
+            "Upload-Length": str(size),
+            "Upload-Metadata": _encode_metadata({
+                "bucketName": bucket,
+                "objectName": object_path,
+                "contentType": content_type,
+                "cacheControl": "3600",
+            }),
+            "x-upsert": "false",
+        },
+    )
+    if create.status_code != 201:
+        raise StorageUploadError(f"재개 가능한 업로드 생성 실패 ({create.status_code}): {create.text}")
+    upload_url = create.headers["Location"]
+
+    offset = 0
+    failures = 0
+    with open(spool_path, "rb") as f:
+        while offset < size:
+            f.seek(offset)
+            data = f.read(TUS_CHUNK_BYTES)
+            try:
+                response = client.patch(
+                    upload_url,
+                    headers={
+                        **base_headers,
+                        "Upload-Offset": str(offset),
+                        "Content-Type": "application/offset+octet-stream",
+                    },
+                    content=data,
+                )
+                response.raise_for_status()
+                offset = int(response.headers.get("Upload-Offset", offset + len(data)))
+                failures = 0
+            except httpx.HTTPError as e:
+                failures += 1
+                if failures > STORAGE_MAX_RETRIES:
+                    raise StorageUploadError(f"업로드 조각 전송 실패 (offset {offset}): {e}") from e
+                logger.warning(f"Upload chunk at offset {offset} failed ({e}); resuming.")
+                time.sleep(min(2 ** failures, 10))
+                head = client.head(upload_url, headers=base_headers)
+                if head.status_code == 200 and "Upload-Offset" in head.headers:
+                    offset = int(head.headers["Upload-Offset"])
+
+def _upload_simple(
+    client: httpx.Client, access_token: str, bucket: str, object_path: str, spool_path: str, content_type: str
+):
+    """작은 파일은 한 번의 요청으로 올립니다. 본문은 파일에서 바로 스트리밍됩니다."""
+    with open(spool_path, "rb") as f:
+        response = client.post(
+            f"{os.getenv('SUPABASE_URL')}/storage/v1/object/{bucket}/{object_path}",
+            headers={**_storage_headers(access_token), "Content-Type": content_type, "x-upsert": "false"},
+            content=f,
+        )
+    if response.status_code >= 400:
+        raise StorageUploadError(f"업로드 실패 ({response.status_code}): {response.text}")
+
+def upload_spooled_file(
+    access_token: str, bucket: str, object_path: str, spool_path: str, content_type: str | None
+) -> str:
+    """임시 파일을 스토리지 버킷에 스트리밍으로 업로드하고 '버킷/경로' 형식의 전체 경로를 반환합니다.
+
+    동기 함수이므로 asyncio.to_thread로 실행합니다.
+    """
+    content_type = content_type or "application/octet-stream"
+    with httpx.Client(timeout=STORAGE_TIMEOUT_SECONDS) as client:
+        if os.path.getsize(spool_path) > RESUMABLE_UPLOAD_THRESHOLD:
+            _upload_resumable(client, access_token, bucket, object_path, spool_path, content_type)
+        else:
+            _upload_simple(client, access_token, bucket, object_path, spool_path, content_type)
+    return f"{bucket}/{object_path}"
+
+def download_to_spool(access_token: str, bucket: str, object_path: str) -> tuple[str, str, int]:
+    """스토리지 객체를 임시 파일로 스트리밍 다운로드합니다. spool_upload와 같은 값을 반환합니다."""
+    digest = hashlib.sha256()
+    size = 0
+    spool = _new_spool_file()
+    try:
+        with spool, httpx.Client(timeout=STORAGE_TIMEOUT_SECONDS) as client:
+            with client.stream(
+                "GET",
+                f"{os.getenv('SUPABASE_URL')}/storage/v1/object/{bucket}/{object_path}",
+                headers=_storage_headers(access_token),
+            ) as response:
+                response.raise_for_status()
+                for data in response.iter_bytes(UPLOAD_READ_CHUNK_BYTES):
+                    digest.update(data)
+                    size += len(data)
+                    spool.write(data)
+    except BaseException:
+        remove_spool(spool.name)
+        raise
+    return spool.name, digest.hexdigest(), size
@@ -1,38 +1,73 @@
 # AIAgentForge/utils/v1_router.py
 
+import os
 import json
-from fastapi import APIRouter, Depends
+import time
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sse_starlette.sse import EventSourceResponse
 from pydantic import BaseModel
 from gotrue.types import User
 
-from AIAgentForge.state.base import BaseState # Supabase 클라이언트 접근
-from AIAgentForge.utils.dependencies import get_current_user
-from AIAgentForge.utils.embedder import generate_embeddings
+from AIAgentForge.utils.dependencies import get_current_user, oauth2_scheme
+from AIAgentForge.utils.embedding_cache import embedding_cache
+from AIAgentForge.utils.query_embedding_cache import query_embedding_cache
+from AIAgentForge.utils.search_result_cache import search_result_cache
+from AIAgentForge.utils.hybrid_search import BatchSearchItem, search_sections_batch, search_sections_phased
+from AIAgentForge.utils.answer_generation import NO_CONTEXT_ANSWER, stream_answer
+from AIAgentForge.utils.ingestion_pipeline import get_stage_stats
+from AIAgentForge.utils.local_vector_index import local_index
+from AIAgentForge.utils.supabase_clients import client_factory
+from AIAgentForge.utils.token_verifier import token_verifier
 
 # API 버전 1을 위한 라우터를 생성합니다.
 api_v1_router = APIRouter(prefix="/api/v1")
 
+# 배치 검색 한 번에 받을 최대 질의 수와 동시에 실행할 검색 수
+BATCH_SEARCH_MAX_QUERIES = int(os.getenv("BATCH_SEARCH_MAX_QUERIES", "100"))
+BATCH_SEARCH_CONCURRENCY = int(os.getenv("BATCH_SEARCH_CONCURRENCY", "8"))
+
 @api_v1_router.get("/health")
 async def health_check():
     """API 서버의 상태를 확인하는 간단한 엔드포인트입니다."""
     return {"status": "ok"}
 
+@api_v1_router.get("/stats")
+async def cache_stats(current_user: User = Depends(get_current_user)):
+    """임베딩/질의 임베딩/검색 결과 캐시 적중률, 수집 단계별 처리량 등 운영 통계를 반환합니다."""
+    return {
+        "embedding_cache": embedding_cache.stats() if embedding_cache else None,
+        "query_embedding_cache": query_embedding_cache.stats() if query_embedding_cache else None,
+        "search_result_cache": search_result_cache.stats() if search_result_cache else None,
+        "ingestion_stages": get_stage_stats(),
+        "local_vector_index": local_index.stats() if local_index else None,
+        "supabase_clients": client_factory.stats(),
+        "token_verifier": token_verifier.stats(),
+    }
+
 class McpRequest(BaseModel):
     query: str
     collection_id: str
     match_count: int = 10
+    # True이면 검색 결과를 근거로 한 LLM 답변을 answer_delta 이벤트로 이어서 스트리밍합니다.
+    answer: bool = False
 
 @api_v1_router.post("/mcp/stream")
 async def mcp_stream_endpoint(
     request_data: McpRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    token: str = Depends(oauth2_scheme),
 ):
     """
     AI 어시스턴트를 위한 MCP 스트리밍 엔드포인트입니다.
-    하이브리드 검색을 수행하고 그 과정을 SSE로 스트리밍합니다.
+    하이브리드 검색을 단계별로 수행하고 각 단계의 결과를 나오는 즉시 SSE로 스트리밍합니다.
+
+    이벤트 순서: search_started → keyword_hits → semantic_hits → fused (+ 호환용 chunks_found)
+    → (answer=True이면) answer_delta ... → answer_done → stream_end
+    각 단계 이벤트에는 phase_ms(단계 소요 시간)와 elapsed_ms(요청 시작부터 경과 시간)가 들어 있습니다.
     """
     async def event_stream_generator():
+        started = time.perf_counter()
         try:
             # 1. 작업 시작 알림
             yield {
@@ -40,34 +75,50 @@ async def mcp_stream_endpoint(
                 "data": json.dumps({"query": request_data.query})
             }
 
-            # 2. 쿼리 임베딩 생성
-            # generate_embeddings는 임베딩 목록을 반환하므로 첫 번째 항목을 가져옵니다.
-            embeddings_list = await generate_embeddings([request_data.query])
-            if not embeddings_list:
-                raise ValueError("임베딩 생성에 실패했습니다.")
-            query_embedding = embeddings_list[0]
-            
-            # 3. RPC 파라미터 준비
-            rpc_params = {
-                "query_text": request_data.query,
-                "query_embedding": query_embedding, # 수정: 1차원 배열로 전달
-                "p_collection_id": request_data.collection_id,
-                "match_count": request_data.match_count,
-                "p_owner_id": str(current_user.id)
-            }
-
-            # 4. hybrid_search_multilingual RPC 실행
-            response =  BaseState.supabase_client.rpc(
-                "hybrid_search_multilingual",
-                params=rpc_params
-            ).execute()
+            # 2. 단계별 하이브리드 검색. 키워드 검색은 질의 임베딩과 동시에 실행되어 먼저 도착합니다.
+            results = []
+            phases = search_sections_phased(
+                token, request_data.collection_id, str(current_user.id),
+                request_data.query, request_data.match_count,
+            )
+            try:
+                async for phase, payload in phases:
+                    yield {"event": phase, "data": json.dumps(payload)}
+                    if phase == "fused":
+                        results = payload["results"]
+            finally:
+                await phases.aclose()
 
-            # 5. 검색 결과 스트리밍
+            # 3. 최종 결과 (이전 클라이언트와의 호환을 위해 유지)
             yield {
                 "event": "chunks_found",
-                "data": json.dumps(response.data)
+                "data": json.dumps(results)
             }
 
+            # 4. 선택: 검색 결과를 근거로 한 답변 스트리밍
+            if request_data.answer:
+                answer_started = time.perf_counter()
+                ttft_ms = None
+                if results:
+                    stream = stream_answer(request_data.query, results)
+                    try:
+                        async for delta in stream:
+                            if ttft_ms is None:
+                                ttft_ms = int((time.perf_counter() - answer_started) * 1000)
+                            yield {"event": "answer_delta", "data": json.dumps({"delta": delta})}
+                    finally:
+                        await stream.aclose()
+                else:
+                    yield {"event": "answer_delta", "data": json.dumps({"delta": NO_CONTEXT_ANSWER})}
+                yield {
+                    "event": "answer_done",
+                    "data": json.dumps({
+                        "ttft_ms": ttft_ms,
+                        "phase_ms": int((time.perf_counter() - answer_started) * 1000),
+                        "elapsed_ms": int((time.perf_counter() - started) * 1000),
+                    }),
+                }
+
         except Exception as e:
             # 오류 발생 시 에러 이벤트 전송
             yield {
@@ -75,10 +126,80 @@ async def mcp_stream_endpoint(
                 "data": json.dumps({"detail": str(e)})
             }
         finally:
-            # 6. 스트림 종료 알림
+            # 5. 스트림 종료 알림
             yield {
                 "event": "stream_end",
                 "data": json.dumps({"message": "Stream completed."})
             }
 
     return EventSourceResponse(event_stream_generator())
+
+class BatchSearchQuery(BaseModel):
+    query: str
+    # 생략하면 요청의 collection_id / match_count를 사용합니다.
+    collection_id: str | None = None
+    match_count: int | None = None
+
+class BatchSearchRequest(BaseModel):
+    queries: list[BatchSearchQuery]
+    collection_id: str | None = None
+    match_count: int = 10
+    # True이면 결과를 끝나는 순서대로 한 줄에 하나씩(NDJSON) 스트리밍합니다.
+    stream: bool = False
+
+@api_v1_router.post("/search/batch")
+async def batch_search_endpoint(
+    request_data: BatchSearchRequest,
+    current_user: User = Depends(get_current_user),
+    token: str = Depends(oauth2_scheme),
+):
+    """
+    여러 질의를 한 번의 요청으로 하이브리드 검색합니다.
+    캐시에 없는 질의는 한 번의 배치로 임베딩하고, 검색은 제한된 동시성으로 실행합니다.
+    기본 응답은 입력 순서대로 정렬된 결과 목록이며, stream=True이면 각 결과를 NDJSON 한 줄로 보냅니다.
+    각 결과에는 입력 순서 번호(index)가 들어 있고, 실패한 질의는 results 대신 error를 담습니다.
+    """
+    if not request_data.queries:
+        raise HTTPException(status_code=400, detail="queries가 비어 있습니다.")
+    if len(request_data.queries) > BATCH_SEARCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {BATCH_SEARCH_MAX_QUERIES}개까지 검색할 수 있습니다.")
+    items = []
+    for query in request_data.queries:
+        collection_id = query.collection_id or request_data.collection_id
+        if not collection_id:
+            raise HTTPException(status_code=400, detail="collection_id가 필요합니다.")
+        items.append(BatchSearchItem(collection_id, query.query, query.match_count or request_data.match_count))
+
+    started = time.perf_counter()
+
+    def to_entry(index: int, result) -> dict:
+        entry = {
+            "index": index,
+            "query": items[index].query,
+            "collection_id": items[index].collection_id,
+            "elapsed_ms": int((time.perf_counter() - started) * 1000),
+        }
+        if isinstance(result, Exception):
+            entry["error"] = str(result)
+        else:
+            entry["results"] = result
+        return entry
+
+    batch = search_sections_batch(
+        token, str(current_user.id), items, BATCH_SEARCH_CONCURRENCY,
+    )
+
+    if request_data.stream:
+        async def ndjson_generator():
+            try:
+                async for index, result in batch:
+                    yield json.dumps(to_entry(index, result), ensure_ascii=False) + "\n"
+            finally:
+                await batch.aclose()
+
+        return StreamingResponse(ndjson_generator(), media_type="application/x-ndjson")
+
+    entries: list[dict | None] = [None] * len(items)
+    async for index, result in batch:
+        entries[index] = to_entry(index, result)
+    return {"results": entries, "elapsed_ms": int((time.perf_counter() - started) * 1000)}
@@ -0,0 +1,86 @@
+# AIAgentForge/utils/vector_settings.py
+import os
+import logging
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+from .embedder import default_dimensions
+from .embedding_providers import get_embedding_provider
+
+logger = logging.getLogger(__name__)
+
+# document_sections에 벡터를 저장하고 검색하는 형식입니다.
+# - "vector": 기존 VECTOR(1536) float32 열. 전체 차원만 저장할 수 있습니다.
+# - "halfvec": float16 halfvec 열. 저장 공간과 거리 계산 비용이 절반이며 컬렉션별 차원을 지원합니다.
+#   SQL/alter_embedding_dimensions_halfvec 마이그레이션 후에 사용합니다.
+EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "vector")
+if EMBEDDING_STORAGE not in ("vector", "halfvec"):
+    raise ValueError(f"EMBEDDING_STORAGE must be 'vector' or 'halfvec', got {EMBEDDING_STORAGE!r}")
+
+# document_sections.embedding 열의 고정 차원 (VECTOR(1536))
+FULL_VECTOR_DIMENSIONS = 1536
+# collections.embedding_dimensions CHECK 제약과 같은 값이어야 합니다.
+SUPPORTED_DIMENSIONS = (256, 384, 512, 768, 1024, 1536)
+
+HYBRID_SEARCH_FUNCTION = (
+    "hybrid_search_multilingual_halfvec" if EMBEDDING_STORAGE == "halfvec" else "hybrid_search_multilingual"
+)
+# 하이브리드 검색의 키워드/의미 검색 부분만 따로 실행하는 함수. 단계별로 결과를 보낼 때 사용합니다.
+KEYWORD_SEARCH_FUNCTION = "keyword_search_sections"
+SEMANTIC_SEARCH_FUNCTION = (
+    "semantic_search_sections_halfvec" if EMBEDDING_STORAGE == "halfvec" else "semantic_search_sections"
+)
+
+# 하이브리드 검색 튜닝 값. 의미/키워드 검색 각각에서 가져올 후보 수(0이면 SQL 기본값: match_count의 4배, 최소 40)와
+# HNSW 탐색 폭(ef_search). 후보 수를 늘리면 RRF 결합의 재현율이 오르고, ef_search를 늘리면 의미 검색의 재현율이 오릅니다.
+SEARCH_CANDIDATE_COUNT = int(os.getenv("SEARCH_CANDIDATE_COUNT", "0"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "100"))
+
+# 컬렉션의 차원은 생성 후 바뀌지 않으므로 프로세스 안에서 계속 재사용합니다.
+_collection_dimensions: dict[str, int] = {}
+
+def check_dimensions(dimensions: int):
+    """현재 저장 형식에서 사용할 수 있는 차원인지 확인합니다."""
+    if dimensions not in SUPPORTED_DIMENSIONS:
+        raise ValueError(f"지원하지 않는 임베딩 차원입니다: {dimensions}")
+    provider = get_embedding_provider()
+    if dimensions > provider.dimensions:
+        raise ValueError(f"{provider.name} 모델은 최대 {provider.dimensions}차원까지 지원합니다.")
+    if EMBEDDING_STORAGE == "vector" and dimensions != FULL_VECTOR_DIMENSIONS:
+        raise ValueError(
+            f"{dimensions}차원 임베딩은 EMBEDDING_STORAGE=halfvec 에서만 사용할 수 있습니다."
+        )
+
+def search_tuning_params() -> dict:
+    """하이브리드 검색 RPC에 함께 넘길 튜닝 파라미터를 반환합니다."""
+    return {
+        "p_candidate_count": SEARCH_CANDIDATE_COUNT or None,
+        "p_ef_search": HNSW_EF_SEARCH,
+    }
+
+def candidate_count(match_count: int) -> int:
+    """의미/키워드 검색 각각의 후보 수. 하이브리드 검색 함수의 기본값과 같습니다."""
+    return SEARCH_CANDIDATE_COUNT or max(match_count * 4, 40)
+
+def _remember_dimensions(collection_id: str, response) -> int:
+    row = response.data if response else None
+    dimensions = (row or {}).get("embedding_dimensions") or default_dimensions()
+    check_dimensions(dimensions)
+    _collection_dimensions[collection_id] = dimensions
+    return dimensions
+
+def get_collection_dimensions(db_client: SyncPostgrestClient, collection_id: str) -> int:
+    """컬렉션의 임베딩 차원을 반환합니다. 설정이 없으면 배포 기본값을 사용합니다."""
+    dimensions = _collection_dimensions.get(collection_id)
+    if dimensions is None:
+        response = db_client.from_("collections").select("embedding_dimensions") \
+            .eq("id", collection_id).maybe_single().execute()
+        dimensions = _remember_dimensions(collection_id, response)
+    return dimensions
+
+async def get_collection_dimensions_async(db_client: AsyncPostgrestClient, collection_id: str) -> int:
+    """get_collection_dimensions의 비동기 클라이언트 버전입니다. 같은 캐시를 사용합니다."""
+    dimensions = _collection_dimensions.get(collection_id)
+    if dimensions is None:
+        response = await db_client.from_("collections").select("embedding_dimensions") \
+            .eq("id", collection_id).maybe_single().execute()
+        dimensions = _remember_dimensions(collection_id, response)
+    return dimensions
@@ -0,0 +1,157 @@
+# scripts/compare_embedding_storage.py
+"""컬렉션의 실제 청크로 임베딩 차원과 저장 형식(vector/halfvec)별 재현율과 검색 지연 시간을 비교합니다.
+
+사용법:
+    python scripts/compare_embedding_storage.py --collection-id <uuid> --email <email> --password <password>
+        [--queries queries.txt] [--sample 50] [--k 10] [--repeat 3]
+
+- 재현율: float32 1536차원 정확 검색의 상위 k개를 기준으로, 앞쪽 차원만 잘라 다시 정규화한 벡터
+  (float32 / float16으로 반올림)의 상위 k개가 얼마나 겹치는지 계산합니다.
+  text-embedding-3 모델은 잘라낸 벡터가 dimensions 파라미터로 받은 벡터와 같으므로 다시 임베딩하지 않습니다.
+- 지연 시간: 같은 질의로 hybrid_search_multilingual과 hybrid_search_multilingual_halfvec RPC를 호출해 비교합니다.
+  SQL/alter_embedding_dimensions_halfvec 마이그레이션 후, float32 열을 삭제하기 전에 실행하세요.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+import numpy as np
+from dotenv import load_dotenv
+from supabase import create_client
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from AIAgentForge.utils.embedder import generate_embeddings  # noqa: E402
+from AIAgentForge.utils.vector_settings import FULL_VECTOR_DIMENSIONS, SUPPORTED_DIMENSIONS  # noqa: E402
+
+load_dotenv()
+
+PAGE_SIZE = 1000
+# pgvector 값 하나의 헤더 크기(바이트)
+VECTOR_HEADER_BYTES = 8
+
+def fetch_sections(client, collection_id: str) -> tuple[list[str], list[str], np.ndarray]:
+    """컬렉션의 모든 청크 id, 내용, float32 임베딩을 가져옵니다."""
+    documents = client.from_("documents").select("id").eq("collection_id", collection_id).execute().data
+    document_ids = [doc["id"] for doc in documents]
+    ids, contents, vectors = [], [], []
+    while document_ids:
+        rows = client.from_("document_sections").select("id, content, embedding") \
+            .in_("document_id", document_ids).not_.is_("embedding", "null").order("id") \
+            .range(len(ids), len(ids) + PAGE_SIZE - 1).execute().data
+        for row in rows:
+            ids.append(row["id"])
+            contents.append(row["content"])
+            vectors.append(json.loads(row["embedding"]))
+        if len(rows) < PAGE_SIZE:
+            break
+    return ids, contents, np.asarray(vectors, dtype=np.float32)
+
+def reduce_vectors(matrix: np.ndarray, dimensions: int, half: bool) -> np.ndarray:
+    """앞쪽 차원만 남기고 다시 정규화합니다. half이면 float16 저장 정밀도로 반올림합니다."""
+    reduced = matrix[:, :dimensions]
+    reduced = reduced / np.linalg.norm(reduced, axis=1, keepdims=True)
+    if half:
+        reduced = reduced.astype(np.float16).astype(np.float32)
+    return reduced
+
+def top_k(documents: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ documents.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def recall_at_k(expected: np.ndarray, actual: np.ndarray) -> float:
+    k = expected.shape[1]
+    return float(np.mean([len(set(e) & set(a)) / k for e, a in zip(expected, actual)]))
+
+def measure_rpc(client, function: str, params: list[dict], repeat: int) -> list[float] | None:
+    """RPC를 질의마다 repeat번 호출한 지연 시간(ms) 목록을 반환합니다. 함수가 없으면 None."""
+    timings = []
+    try:
+        for _ in range(repeat):
+            for param in params:
+                started = time.perf_counter()
+                client.rpc(function, param).execute()
+                timings.append((time.perf_counter() - started) * 1000)
+    except Exception as e:
+        print(f"  {function} 호출 실패: {e}")
+        return None
+    return timings
+
+def describe(timings: list[float]) -> str:
+    p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) >= 20 else max(timings)
+    return f"p50 {statistics.median(timings):7.1f} ms  p95 {p95:7.1f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection-id", required=True)
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--queries", help="질의를 한 줄에 하나씩 담은 파일. 없으면 청크 내용 일부를 질의로 사용합니다.")
+    parser.add_argument("--sample", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ef-search", type=int, default=100, help="HNSW 탐색 폭 (p_ef_search)")
+    parser.add_argument("--candidates", type=int, help="의미/키워드 검색 후보 수 (p_candidate_count)")
+    args = parser.parse_args()
+
+    client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_ANON_KEY"))
+    session = client.auth.sign_in_with_password({"email": args.email, "password": args.password})
+    user_id = session.user.id
+
+    ids, contents, matrix = fetch_sections(client, args.collection_id)
+    if len(ids) == 0:
+        print("float32 임베딩이 저장된 청크가 없습니다.")
+        return
+    print(f"청크 {len(ids)}개, 질의 {args.sample}개, k={args.k}")
+
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()][:args.sample]
+    else:
+        queries = [text[:300] for text in random.sample(contents, min(args.sample, len(contents)))]
+    query_matrix = np.asarray(asyncio.run(generate_embeddings(queries, FULL_VECTOR_DIMENSIONS)), dtype=np.float32)
+
+    k = min(args.k, len(ids))
+    baseline = top_k(matrix, query_matrix, k)
+    print("\n[재현율 / 벡터당 크기 / 컬렉션 전체 벡터 크기]")
+    for dimensions in sorted(SUPPORTED_DIMENSIONS, reverse=True):
+        for half in (False, True):
+            result = top_k(reduce_vectors(matrix, dimensions, half), reduce_vectors(query_matrix, dimensions, half), k)
+            vector_bytes = dimensions * (2 if half else 4) + VECTOR_HEADER_BYTES
+            print(
+                f"  {'halfvec' if half else 'vector ':7} {dimensions:5}차원  recall@{k} {recall_at_k(baseline, result):.3f}"
+                f"  {vector_bytes:6} B  {vector_bytes * len(ids) / 1024 / 1024:8.1f} MB"
+            )
+
+    print("\n[검색 지연 시간]")
+    collection = client.from_("collections").select("embedding_dimensions") \
+        .eq("id", args.collection_id).single().execute().data
+    dimensions = collection.get("embedding_dimensions") or FULL_VECTOR_DIMENSIONS
+    base_params = {
+        "p_owner_id": user_id,
+        "p_collection_id": args.collection_id,
+        "match_count": k,
+        "p_ef_search": args.ef_search,
+        "p_candidate_count": args.candidates,
+    }
+    full_params = [
+        {**base_params, "query_text": query, "query_embedding": vector.tolist()}
+        for query, vector in zip(queries, query_matrix)
+    ]
+    half_params = [
+        {**base_params, "query_text": query, "query_embedding": vector.tolist()}
+        for query, vector in zip(queries, reduce_vectors(query_matrix, dimensions, half=False))
+    ]
+    for function, params in (
+        ("hybrid_search_multilingual", full_params),
+        ("hybrid_search_multilingual_halfvec", half_params),
+    ):
+        timings = measure_rpc(client, function, params, args.repeat)
+        if timings:
+            print(f"  {function:36} {describe(timings)}")
+
+if __name__ == "__main__":
+    main()
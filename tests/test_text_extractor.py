@@ -0,0 +1,50 @@
+from docx import Document
+
+from AIAgentForge.utils.text_extractor import DOCX_BLOCK_CHARS, DOCX_MIME_TYPE, TEXT_READ_BYTES, iter_text_from_file
+
+
+def _write_docx(path, paragraphs):
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    doc.save(path)
+
+
+def test_extract_docx_from_path(tmp_path):
+    path = tmp_path / "sample.docx"
+    _write_docx(path, ["첫 번째 문단", "second paragraph"])
+
+    blocks = list(iter_text_from_file(str(path), DOCX_MIME_TYPE))
+
+    text = "".join(text for _, text in blocks)
+    assert "첫 번째 문단" in text
+    assert "second paragraph" in text
+    assert blocks[0][0] == 1
+
+
+def test_extract_docx_from_path_matches_bytes(tmp_path):
+    path = tmp_path / "sample.docx"
+    _write_docx(path, [f"paragraph {i}" for i in range(50)])
+
+    from_path = list(iter_text_from_file(path, DOCX_MIME_TYPE))
+    from_bytes = list(iter_text_from_file(path.read_bytes(), DOCX_MIME_TYPE))
+
+    assert from_path == from_bytes
+
+
+def test_max_pages_caps_docx_blocks(tmp_path):
+    path = tmp_path / "long.docx"
+    _write_docx(path, ["x" * DOCX_BLOCK_CHARS for _ in range(5)])
+
+    blocks = list(iter_text_from_file(path, DOCX_MIME_TYPE, max_pages=2))
+
+    assert [number for number, _ in blocks] == [1, 2]
+
+
+def test_max_pages_caps_plain_text_blocks(tmp_path):
+    path = tmp_path / "long.txt"
+    path.write_bytes(b"a" * (TEXT_READ_BYTES * 5))
+
+    text = "".join(text for _, text in iter_text_from_file(path, "text/plain", max_pages=2))
+
+    assert len(text) == TEXT_READ_BYTES * 2